@@ -5,6 +5,8 @@ from .db import SessionLocal
 from .models.review import Review
 from .models.essay import Essay
 from .services.ai import analyze_essay_async
+from .services.essay_edits import fold_pending_edits
+from .services.grade_sync import dispatch_pending, lms_client
 import asyncio
 
 celery_app = Celery(
@@ -12,6 +14,12 @@ celery_app = Celery(
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
 )
+celery_app.conf.beat_schedule = {
+    "lms-dispatch-grades": {
+        "task": "lms.dispatch_grades",
+        "schedule": settings.lms_dispatch_interval_seconds,
+    },
+}
 
 @celery_app.task(name="ai.feedback")
 def run_ai_feedback(essay_id: int) -> dict:
@@ -20,9 +28,11 @@ def run_ai_feedback(essay_id: int) -> dict:
         essay = db.query(Essay).filter(Essay.id == essay_id).first()
         if not essay:
             return {"status": "not_found"}
+        fold_pending_edits(db, essay)
         result = asyncio.run(analyze_essay_async(essay.content))
         review = Review(
             essay_id=essay.id,
+            essay_revision=essay.content_revision,
             reviewer_id=None,
             comments=None,
             grammar_score=result.get("grammar_score"),
@@ -35,5 +45,14 @@ def run_ai_feedback(essay_id: int) -> dict:
         db.commit()
         db.refresh(review)
         return {"status": "ok", "review_id": review.id}
+    finally:
+        db.close()
+
+@celery_app.task(name="lms.dispatch_grades")
+def dispatch_grades() -> dict:
+    db: Session = SessionLocal()
+    try:
+        with lms_client() as client:
+            return dispatch_pending(db, client)
     finally:
         db.close()
\ No newline at end of file
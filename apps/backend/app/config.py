@@ -15,9 +15,25 @@ class Settings(BaseSettings):
 
     database_url: str = Field(default="sqlite:///./writewise_demo.db")
 
+    # Pending autosave edits are folded into Essay.content once this many accumulate
+    essay_edit_fold_threshold: int = Field(default=50)
+    # Revision history keeps a full snapshot at least this many revisions apart
+    essay_snapshot_interval: int = Field(default=100)
+
     redis_url: str = Field(default="redis://redis:6379/0")
     celery_broker_url: str = Field(default="redis://redis:6379/1")
     celery_result_backend: str = Field(default="redis://redis:6379/2")
+    # "redis" keeps leaderboards in sorted sets at redis_url; "memory" is per-process and rebuilt on startup
+    leaderboard_backend: str = Field(default="memory")
+
+    lms_base_url: str = Field(default="http://localhost:9000")
+    lms_api_token: str | None = None
+    lms_webhook_secret: str | None = None
+    lms_batch_size: int = Field(default=100)
+    lms_max_attempts: int = Field(default=8)
+    lms_retry_base_seconds: float = Field(default=5.0)
+    lms_lease_seconds: float = Field(default=900.0)
+    lms_dispatch_interval_seconds: float = Field(default=10.0)
 
     gemini_api_key: str | None = None
     gemini_model: str = Field(default="gemini-1.5-flash")
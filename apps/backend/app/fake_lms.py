@@ -0,0 +1,108 @@
+"""
+Stand-in LMS for exercising grade passback locally.
+
+    FAKE_LMS_FAILURE_RATE=0.2 FAKE_LMS_LATENCY_MS=50 uvicorn app.fake_lms:app --port 9000
+
+Point LMS_BASE_URL at it and watch GET /stats. Knobs (env vars or POST /config):
+  failure_rate       share of batches answered with 503
+  latency_ms         delay added to every batch
+  rate_limit         batches per second before answering 429 with Retry-After
+  reject_rate        share of individual grades rejected in an otherwise good batch
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake LMS")
+
+config: Dict[str, float] = {
+    "failure_rate": float(os.getenv("FAKE_LMS_FAILURE_RATE", "0")),
+    "latency_ms": float(os.getenv("FAKE_LMS_LATENCY_MS", "0")),
+    "rate_limit": float(os.getenv("FAKE_LMS_RATE_LIMIT", "0")),
+    "reject_rate": float(os.getenv("FAKE_LMS_REJECT_RATE", "0")),
+}
+
+def _fresh_stats() -> Dict[str, Any]:
+    return {
+        "started_at": time.time(),
+        "batches": 0,
+        "failed_batches": 0,
+        "rate_limited": 0,
+        "grades_received": 0,
+        "grades_stored": 0,
+        "duplicates": 0,
+        "rejected": 0,
+    }
+
+stats = _fresh_stats()
+grades: Dict[str, Dict[str, Any]] = {}
+window: List[float] = []
+
+class Grade(BaseModel):
+    idempotency_key: str
+    assignment_id: str
+    student: str
+    score: float
+    max_score: float = 10
+
+class GradeBatch(BaseModel):
+    grades: List[Grade]
+
+@app.post("/courses/{course_id}/grades")
+async def receive_grades(course_id: str, batch: GradeBatch):
+    now = time.time()
+    if config["rate_limit"]:
+        window[:] = [t for t in window if now - t < 1.0]
+        if len(window) >= config["rate_limit"]:
+            stats["rate_limited"] += 1
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+        window.append(now)
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+    stats["batches"] += 1
+    if random.random() < config["failure_rate"]:
+        stats["failed_batches"] += 1
+        return JSONResponse({"error": "unavailable"}, status_code=503)
+
+    results = []
+    for grade in batch.grades:
+        stats["grades_received"] += 1
+        if grade.idempotency_key in grades:
+            stats["duplicates"] += 1
+        elif random.random() < config["reject_rate"]:
+            stats["rejected"] += 1
+            results.append({"idempotency_key": grade.idempotency_key, "status": "error", "error": "Unknown student"})
+            continue
+        else:
+            grades[grade.idempotency_key] = {"course_id": course_id, **grade.model_dump()}
+            stats["grades_stored"] += 1
+        results.append({"idempotency_key": grade.idempotency_key, "status": "ok"})
+    return {"results": results}
+
+@app.get("/stats")
+def get_stats():
+    elapsed = max(time.time() - stats["started_at"], 1e-9)
+    return {**stats, "config": config, "grades_per_second": stats["grades_stored"] / elapsed}
+
+@app.post("/config")
+def set_config(values: Dict[str, float]):
+    config.update({key: value for key, value in values.items() if key in config})
+    return config
+
+@app.post("/reset")
+def reset():
+    stats.clear()
+    stats.update(_fresh_stats())
+    grades.clear()
+    window.clear()
+    return {"ok": True}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("FAKE_LMS_PORT", "9000")))
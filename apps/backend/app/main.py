@@ -1,19 +1,24 @@
 ﻿from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 import os
 
 # Import database-related modules
-from .db import engine
+from .db import engine, SessionLocal
 from .models.base import Base
 from .routers import auth as auth_router
 from .routers import essays as essays_router
 from .routers import reviews as reviews_router
 from .routers import analytics as analytics_router
 from .routers import lms as lms_router
+from .routers import courses as courses_router
+from .routers import assignments as assignments_router
+from .routers import leaderboards as leaderboards_router
 from .demo_data import create_demo_data
+from .config import settings
+from .services.leaderboard import rebuild_from_db
 
-app = FastAPI(title="WriteWise Backend", version="0.1.0")
+app = FastAPI(title="WriteWise Backend", version="0.1.0", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 def on_startup() -> None:
@@ -24,6 +29,13 @@ def on_startup() -> None:
         # Create demo data
         create_demo_data()
         print("Demo data initialized")
+
+        if settings.leaderboard_backend == "memory":
+            db = SessionLocal()
+            try:
+                print(f"Leaderboards rebuilt from {rebuild_from_db(db)} completed reviews")
+            finally:
+                db.close()
         
     except Exception as e:
         print(f"Database startup failed: {e}")
@@ -55,6 +67,9 @@ app.include_router(essays_router.router)
 app.include_router(reviews_router.router)
 app.include_router(analytics_router.router)
 app.include_router(lms_router.router)
+app.include_router(courses_router.router)
+app.include_router(assignments_router.router)
+app.include_router(leaderboards_router.router)
 
 # Serve static files for frontend
 if not os.path.exists("static"):
@@ -1 +1,3 @@
 # Models package
+# Import every model so string-based relationships resolve wherever one of them is used
+from . import user, course, assignment, essay, essay_revision, review, grade_outbox, lms_event  # noqa: F401
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -10,11 +10,19 @@ class Essay(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True, index=True)
     is_draft = Column(Boolean, default=True)
+    # Bumped on every content change; clients send it back as the base of their edits
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    # Revision that content reflects; newer revisions are deltas not yet folded in
+    content_revision = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every UPDATE of the row, ORM or bulk; read endpoints build their ETags from it
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     author = relationship("User", back_populates="essays")
+    assignment = relationship("Assignment", back_populates="essays")
     reviews = relationship("Review", back_populates="essay")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+
+from .base import Base
+
+class EssayRevision(Base):
+    """
+    One entry in an essay's history. Most rows hold a compressed text operation from the
+    previous revision; every so often a row holds a compressed full snapshot instead.
+    """
+    __tablename__ = "essay_revisions"
+    __table_args__ = (UniqueConstraint("essay_id", "revision"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    essay_id = Column(Integer, ForeignKey("essays.id"), nullable=False, index=True)
+    revision = Column(Integer, nullable=False)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    data = Column(LargeBinary, nullable=False)
+    # Length of the document at this revision, so edits can be validated without loading it
+    length = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
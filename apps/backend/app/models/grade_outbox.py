@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum, Index
+from sqlalchemy.sql import func
+from enum import Enum as PyEnum
+
+from .base import Base
+
+class OutboxStatus(PyEnum):
+    PENDING = "pending"
+    # Claimed by a dispatcher until leased_until; expired leases are claimed again
+    IN_FLIGHT = "in_flight"
+    SENT = "sent"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"
+
+class GradeOutbox(Base):
+    """A grade waiting to be pushed to the LMS, written in the same transaction as the review"""
+    __tablename__ = "grade_outbox"
+    __table_args__ = (Index("ix_grade_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    review_id = Column(Integer, ForeignKey("reviews.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    lms_course_id = Column(String, nullable=False)
+    lms_assignment_id = Column(String, nullable=False)
+    student_email = Column(String, nullable=False)
+    score = Column(Float, nullable=False)
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    leased_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    @property
+    def idempotency_key(self) -> str:
+        return f"writewise-grade-{self.id}"
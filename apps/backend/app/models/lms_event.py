@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+
+from .base import Base
+
+class LmsEvent(Base):
+    """Webhook deliveries already processed, keyed by the LMS event id so redeliveries are no-ops"""
+    __tablename__ = "lms_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum, Index
+from sqlalchemy.sql import func, literal_column
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 
@@ -13,19 +13,33 @@ class ReviewStatus(PyEnum):
 
 class Review(Base):
     __tablename__ = "reviews"
+    # Serves per-essay lookups and "latest review of an essay" ordering
+    __table_args__ = (Index("ix_reviews_essay_id_created_at", "essay_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     essay_id = Column(Integer, ForeignKey("essays.id"), nullable=False)
-    reviewer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Essay revision the scores refer to; the text can be rebuilt from essay_revisions
+    essay_revision = Column(Integer, nullable=True)
+    reviewer_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     comments = Column(Text, nullable=True)
     grammar_score = Column(Float, nullable=True)
     clarity_score = Column(Float, nullable=True)
     argument_score = Column(Float, nullable=True)
     ai_summary = Column(Text, nullable=True)
     status = Column(Enum(ReviewStatus), default=ReviewStatus.PENDING)
+    # Bumped by every UPDATE of the row, ORM or bulk; read endpoints build their ETags from it
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
+    # First time the review was completed; regrades keep it, so points stay in that period
+    completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     essay = relationship("Essay", back_populates="reviews")
     reviewer = relationship("User", back_populates="reviews")
+
+    @property
+    def has_feedback(self) -> bool:
+        """Whether the reviewer wrote anything: a comment or at least one score"""
+        scores = (self.grammar_score, self.clarity_score, self.argument_score)
+        return bool((self.comments or "").strip()) or any(score is not None for score in scores)
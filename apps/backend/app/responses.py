@@ -0,0 +1,53 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+def row_columns(model, schema: type[BaseModel]) -> list:
+    """Columns of model named like the fields of an output schema, so rows come out already shaped"""
+    return [getattr(model, name).label(name) for name in schema.model_fields]
+
+def fetch_rows(db: Session, model, schema: type[BaseModel], *criteria, order_by=()) -> list[dict]:
+    """Select plain rows for schema instead of building ORM objects and re-validating them"""
+    stmt = select(*row_columns(model, schema)).where(*criteria).order_by(*order_by)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+def make_etag(*parts) -> str:
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps that are already UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags or etag[2:] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+def cached_json(request: Request, etag: str, last_modified: Optional[datetime], build: Callable[[], object]) -> Response:
+    """
+    Answer 304 when the client's validators still match, otherwise call build and encode
+    its result with orjson. build is never called for a 304.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(build(), headers=headers)
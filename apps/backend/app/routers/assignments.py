@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models.assignment import Assignment
+from ..models.user import User
+from ..schemas.assignment import PeerReviewRequest, PeerReviewResult, ReassignRequest
+from ..deps import require_roles
+from ..services.peer_review import AssignmentError, create_peer_reviews, reassign_dropped
+from .courses import get_owned_course
+
+router = APIRouter(prefix="/assignments", tags=["assignments"])
+
+def get_owned_assignment(db: Session, assignment_id: int, user: User) -> Assignment:
+    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Not found")
+    get_owned_course(db, assignment.course_id, user)
+    return assignment
+
+@router.post("/{assignment_id}/peer-reviews", response_model=PeerReviewResult)
+def assign_peer_reviews(assignment_id: int, payload: PeerReviewRequest, db: Session = Depends(get_db), user: User = Depends(require_roles("teacher", "admin"))):
+    assignment = get_owned_assignment(db, assignment_id, user)
+    try:
+        return create_peer_reviews(db, assignment, payload.conflicts, payload.seed)
+    except AssignmentError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/{assignment_id}/peer-reviews/reassign", response_model=PeerReviewResult)
+def reassign_peer_reviews(assignment_id: int, payload: ReassignRequest, db: Session = Depends(get_db), user: User = Depends(require_roles("teacher", "admin"))):
+    assignment = get_owned_assignment(db, assignment_id, user)
+    return reassign_dropped(db, assignment, payload.dropped_user_ids, payload.conflicts)
@@ -0,0 +1,76 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models.course import Course
+from ..models.assignment import Assignment
+from ..models.user import User
+from ..schemas.course import CourseCreate, CourseOut
+from ..schemas.assignment import AssignmentCreate, AssignmentOut
+from ..schemas.dashboard import DashboardOut
+from ..deps import get_current_user, require_roles
+from ..services.dashboard import course_dashboard
+
+router = APIRouter(prefix="/courses", tags=["courses"])
+
+def get_owned_course(db: Session, course_id: int, user: User) -> Course:
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Not found")
+    if user.role.value != "admin" and course.teacher_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return course
+
+@router.post("", response_model=CourseOut)
+def create_course(payload: CourseCreate, db: Session = Depends(get_db), user: User = Depends(require_roles("teacher", "admin"))):
+    course = Course(teacher_id=user.id, **payload.model_dump())
+    db.add(course)
+    db.commit()
+    db.refresh(course)
+    return course
+
+@router.get("", response_model=list[CourseOut])
+def list_my_courses(db: Session = Depends(get_db), user: User = Depends(require_roles("teacher", "admin"))):
+    return db.query(Course).filter(Course.teacher_id == user.id).order_by(Course.created_at.desc()).all()
+
+@router.post("/{course_id}/assignments", response_model=AssignmentOut)
+def create_assignment(course_id: int, payload: AssignmentCreate, db: Session = Depends(get_db), user: User = Depends(require_roles("teacher", "admin"))):
+    course = get_owned_course(db, course_id, user)
+    assignment = Assignment(course_id=course.id, **payload.model_dump())
+    db.add(assignment)
+    db.commit()
+    db.refresh(assignment)
+    return assignment
+
+@router.get("/{course_id}/assignments", response_model=list[AssignmentOut])
+def list_assignments(course_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return db.query(Assignment).filter(Assignment.course_id == course_id).order_by(Assignment.created_at.desc()).all()
+
+@router.get("/{course_id}/dashboard", response_model=DashboardOut)
+def grading_dashboard(
+    course_id: int,
+    assignment_id: Optional[int] = None,
+    status: Optional[Literal["draft", "submitted", "ai_reviewed", "in_review", "graded"]] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    sort: Literal["score", "status", "updated_at", "author", "title"] = "updated_at",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(default=500, ge=1, le=2000),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    user: User = Depends(require_roles("teacher", "admin")),
+):
+    get_owned_course(db, course_id, user)
+    return course_dashboard(
+        db, course_id,
+        assignment_id=assignment_id,
+        status=status,
+        min_score=min_score,
+        max_score=max_score,
+        sort=sort,
+        descending=order == "desc",
+        limit=limit,
+        offset=offset,
+    )
@@ -1,33 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import exists, func, or_
 from sqlalchemy.orm import Session
 
 from ..db import get_db
+from ..models.assignment import Assignment
 from ..models.essay import Essay
+from ..models.essay_revision import EssayRevision
+from ..models.review import Review
 from ..models.user import User
-from ..schemas.essay import EssayCreate, EssayOut, EssayUpdate
+from ..schemas.essay import (
+    EssayCreate, EssayDiffOut, EssayOut, EssayPatch, EssayPatchOut, EssayRevisionContent, EssayRevisionOut, EssayUpdate,
+)
 from ..deps import get_current_user
+from ..responses import cached_json, fetch_rows, make_etag
+from ..services.essay_edits import EditConflict, fold_pending_edits, fold_pending_edits_for, record_edit, replace_content
+from ..services.essay_history import add_snapshot, reconstruct
+from ..services.text_ops import OperationError, diff
 from ..celery_app import run_ai_feedback
 
 router = APIRouter(prefix="/essays", tags=["essays"])
 
+def _readable_by(user: User):
+    """Authors can read their essays and reviewers the essays they were assigned"""
+    return or_(
+        Essay.author_id == user.id,
+        exists().where(Review.essay_id == Essay.id, Review.reviewer_id == user.id),
+    )
+
 @router.post("", response_model=EssayOut)
 def create_essay(payload: EssayCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    essay = Essay(author_id=user.id, title=payload.title, content=payload.content)
+    if payload.assignment_id is not None and not db.query(Assignment.id).filter(Assignment.id == payload.assignment_id).first():
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    essay = Essay(
+        author_id=user.id,
+        assignment_id=payload.assignment_id,
+        title=payload.title,
+        content=payload.content,
+        revision=0,
+        content_revision=0,
+    )
     db.add(essay)
+    db.flush()
+    add_snapshot(db, essay.id, 0, essay.content)
     db.commit()
     db.refresh(essay)
     return essay
 
 @router.get("", response_model=list[EssayOut])
-def list_my_essays(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Essay).filter(Essay.author_id == user.id).order_by(Essay.created_at.desc()).all()
+def list_my_essays(request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    # Version sums catch edits that land within the timestamp resolution
+    count, last_modified, versions, last_id = db.query(
+        func.count(Essay.id),
+        func.max(func.coalesce(Essay.updated_at, Essay.created_at)),
+        func.sum(Essay.version),
+        func.max(Essay.id),
+    ).filter(Essay.author_id == user.id).one()
+
+    def build():
+        stale = db.query(Essay).filter(Essay.author_id == user.id, Essay.revision > Essay.content_revision).all()
+        fold_pending_edits_for(db, stale)
+        return fetch_rows(db, Essay, EssayOut, Essay.author_id == user.id, order_by=(Essay.created_at.desc(),))
+
+    return cached_json(request, make_etag("essays", user.id, count, versions, last_id), last_modified, build)
 
 @router.get("/{essay_id}", response_model=EssayOut)
-def get_essay(essay_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    essay = db.query(Essay).filter(Essay.id == essay_id, Essay.author_id == user.id).first()
-    if not essay:
+def get_essay(essay_id: int, request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    stamp = (
+        db.query(Essay.version, Essay.revision, Essay.content_revision, Essay.created_at, Essay.updated_at)
+        .filter(Essay.id == essay_id, _readable_by(user))
+        .first()
+    )
+    if not stamp:
         raise HTTPException(status_code=404, detail="Not found")
-    return essay
+    version, revision, content_revision, created_at, updated_at = stamp
+    last_modified = updated_at or created_at
+
+    def build():
+        if revision > content_revision:
+            fold_pending_edits(db, db.query(Essay).filter(Essay.id == essay_id).one())
+        return fetch_rows(db, Essay, EssayOut, Essay.id == essay_id)[0]
+
+    return cached_json(request, make_etag("essay", essay_id, version), last_modified, build)
 
 @router.put("/{essay_id}", response_model=EssayOut)
 def update_essay(essay_id: int, payload: EssayUpdate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
@@ -37,13 +90,60 @@ def update_essay(essay_id: int, payload: EssayUpdate, db: Session = Depends(get_
     if payload.title is not None:
         essay.title = payload.title
     if payload.content is not None:
-        essay.content = payload.content
+        try:
+            replace_content(db, essay, payload.content)
+        except EditConflict as e:
+            raise HTTPException(status_code=409, detail=str(e), headers={"X-Essay-Revision": str(e.revision)})
     if payload.is_draft is not None:
         essay.is_draft = payload.is_draft
     db.commit()
     db.refresh(essay)
     return essay
 
+@router.patch("/{essay_id}", response_model=EssayPatchOut)
+def patch_essay(essay_id: int, payload: EssayPatch, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    # Autosave path: only the edit travels and gets written, not the whole essay
+    found = db.query(Essay.id).filter(Essay.id == essay_id, Essay.author_id == user.id).first()
+    if not found:
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        revision = record_edit(db, essay_id, payload.base_revision, payload.ops)
+    except EditConflict as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"X-Essay-Revision": str(e.revision)})
+    except OperationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"id": essay_id, "revision": revision}
+
+@router.get("/{essay_id}/revisions", response_model=list[EssayRevisionOut])
+def list_revisions(essay_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    if not db.query(Essay.id).filter(Essay.id == essay_id, _readable_by(user)).first():
+        raise HTTPException(status_code=404, detail="Not found")
+    return (
+        db.query(EssayRevision)
+        .filter(EssayRevision.essay_id == essay_id)
+        .order_by(EssayRevision.revision.desc())
+        .all()
+    )
+
+@router.get("/{essay_id}/revisions/{revision}", response_model=EssayRevisionContent)
+def get_revision(essay_id: int, revision: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    if not db.query(Essay.id).filter(Essay.id == essay_id, _readable_by(user)).first():
+        raise HTTPException(status_code=404, detail="Not found")
+    content = reconstruct(db, essay_id, revision)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {"revision": revision, "content": content}
+
+@router.get("/{essay_id}/diff", response_model=EssayDiffOut)
+def diff_revisions(essay_id: int, from_revision: int, to_revision: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    if not db.query(Essay.id).filter(Essay.id == essay_id, _readable_by(user)).first():
+        raise HTTPException(status_code=404, detail="Not found")
+    old = reconstruct(db, essay_id, from_revision)
+    new = reconstruct(db, essay_id, to_revision)
+    if old is None or new is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {"from_revision": from_revision, "to_revision": to_revision, "ops": diff(old, new)}
+
 @router.post("/{essay_id}/ai-feedback")
 def trigger_ai_feedback(essay_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     essay = db.query(Essay).filter(Essay.id == essay_id, Essay.author_id == user.id).first()
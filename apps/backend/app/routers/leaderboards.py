@@ -0,0 +1,43 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models.user import User
+from ..schemas.leaderboard import LeaderboardOut, StreakOut
+from ..deps import get_current_user
+from ..services.leaderboard import board_key, current_streak, get_leaderboard_store
+
+router = APIRouter(prefix="/leaderboards", tags=["leaderboards"])
+
+Period = Literal["all", "week", "month"]
+
+def _with_names(db: Session, course_id: int, period: str, start: int, entries) -> dict:
+    ids = [int(member) for member, _ in entries]
+    names = {
+        user_id: f"{first} {last}"
+        for user_id, first, last in db.query(User.id, User.first_name, User.last_name).filter(User.id.in_(ids))
+    }
+    return {
+        "course_id": course_id,
+        "period": period,
+        "entries": [
+            {"rank": start + i + 1, "user_id": user_id, "name": names.get(user_id), "points": points}
+            for i, (user_id, (_, points)) in enumerate(zip(ids, entries))
+        ],
+    }
+
+@router.get("/courses/{course_id}", response_model=LeaderboardOut)
+def top(course_id: int, period: Period = "all", limit: int = Query(default=10, ge=1, le=100), db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    entries = get_leaderboard_store().top(board_key(course_id, period), limit)
+    return _with_names(db, course_id, period, 0, entries)
+
+@router.get("/courses/{course_id}/me", response_model=LeaderboardOut)
+def around_me(course_id: int, period: Period = "all", radius: int = Query(default=5, ge=0, le=50), db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    start, entries = get_leaderboard_store().around(board_key(course_id, period), str(user.id), radius)
+    return _with_names(db, course_id, period, start or 0, entries)
+
+@router.get("/streaks/me", response_model=StreakOut)
+def my_streak(user: User = Depends(get_current_user)):
+    return current_streak(get_leaderboard_store(), user.id)
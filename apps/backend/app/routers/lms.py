@@ -1,15 +1,38 @@
-from fastapi import APIRouter, Depends
+import hashlib
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import get_db
 from ..deps import require_roles
-from ..models.user import UserRole
+from ..schemas.lms import LmsWebhookEvent
+from ..services.grade_sync import handle_webhook
+from ..celery_app import dispatch_grades
 
 router = APIRouter(prefix="/lms", tags=["lms"])
 
 @router.post("/sync", dependencies=[Depends(require_roles("teacher", "admin"))])
-def sync_placeholder():
-    # Placeholder for LMS sync (Moodle/Canvas/Google Classroom)
+def sync_grades():
+    # Grades are queued in the outbox as reviews complete; this just flushes it now
+    dispatch_grades.delay()
     return {"status": "queued"}
 
 @router.post("/webhook")
-def webhook_placeholder():
-    # Placeholder endpoint to receive grade sync callbacks
-    return {"ok": True}
\ No newline at end of file
+async def webhook(request: Request, db: Session = Depends(get_db)):
+    # Without a secret nothing can be verified, and an unsigned event could mark any grade settled
+    if not settings.lms_webhook_secret:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+    body = await request.body()
+    expected = hmac.new(settings.lms_webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, request.headers.get("x-lms-signature", "")):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    try:
+        event = LmsWebhookEvent.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    processed = await run_in_threadpool(handle_webhook, db, event.event_id, event.type, event.data)
+    return {"ok": True, "duplicate": not processed}
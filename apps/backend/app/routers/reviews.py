@@ -1,21 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ..db import get_db
-from ..models.review import Review
-from ..models.user import User, UserRole
-from ..schemas.review import ReviewOut, ReviewUpdate
+from ..models.essay import Essay
+from ..models.essay_revision import EssayRevision
+from ..models.review import Review, ReviewStatus
+from ..models.user import User
+from ..schemas.review import PeerReviewUpdate, ReviewOut, ReviewUpdate
 from ..deps import get_current_user, require_roles
+from ..responses import cached_json, fetch_rows, make_etag
+from ..services.grade_sync import enqueue_grade
+from ..services.leaderboard import record_review_safely
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+SCORE_FIELDS = {"grammar_score", "clarity_score", "argument_score"}
+
 @router.get("/my", response_model=list[ReviewOut])
-def my_reviews(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Review).filter(Review.reviewer_id == user.id).order_by(Review.created_at.desc()).all()
+def my_reviews(request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return _cached_reviews(request, db, ("my", user.id), Review.reviewer_id == user.id)
 
 @router.get("/essay/{essay_id}", response_model=list[ReviewOut])
-def reviews_for_essay(essay_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Review).filter(Review.essay_id == essay_id).all()
+def reviews_for_essay(essay_id: int, request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return _cached_reviews(request, db, ("essay", essay_id), Review.essay_id == essay_id)
+
+def _cached_reviews(request: Request, db: Session, key: tuple, criterion):
+    count, last_modified, versions, last_id = db.query(
+        func.count(Review.id),
+        func.max(func.coalesce(Review.updated_at, Review.created_at)),
+        func.sum(Review.version),
+        func.max(Review.id),
+    ).filter(criterion).one()
+    return cached_json(
+        request,
+        make_etag("reviews", *key, count, versions, last_id),
+        last_modified,
+        lambda: fetch_rows(db, Review, ReviewOut, criterion, order_by=(Review.created_at.desc(),)),
+    )
+
+def _staff_review_from_ai(db: Session, ai_review: Review, user: User) -> Review:
+    """The user's own review of the essay, started from the AI review's scores the first time"""
+    review = (
+        db.query(Review)
+        .filter(Review.essay_id == ai_review.essay_id, Review.reviewer_id == user.id)
+        .order_by(Review.id.desc())
+        .first()
+    )
+    if review:
+        return review
+    review = Review(
+        essay_id=ai_review.essay_id,
+        essay_revision=ai_review.essay_revision,
+        reviewer_id=user.id,
+        comments=ai_review.comments,
+        grammar_score=ai_review.grammar_score,
+        clarity_score=ai_review.clarity_score,
+        argument_score=ai_review.argument_score,
+        status=ReviewStatus.IN_PROGRESS,
+    )
+    db.add(review)
+    db.flush()
+    return review
+
+def _apply_changes(db: Session, review: Review, changes: dict) -> None:
+    current_revision = db.query(Essay.revision).filter(Essay.id == review.essay_id).scalar()
+    if changes.get("essay_revision") is not None:
+        revision = changes["essay_revision"]
+        known = db.query(EssayRevision.id).filter(
+            EssayRevision.essay_id == review.essay_id, EssayRevision.revision == revision
+        ).first()
+        if not known and revision != current_revision:
+            raise HTTPException(status_code=422, detail="Unknown essay revision")
+    elif review.essay_revision is None or SCORE_FIELDS & changes.keys():
+        # New scores without an explicit revision refer to the essay as it stands now;
+        # comment-only edits keep the revision that was graded
+        changes["essay_revision"] = current_revision
+    for field, value in changes.items():
+        setattr(review, field, value)
 
 @router.put("/{review_id}", response_model=ReviewOut, dependencies=[Depends(require_roles("teacher", "admin"))])
 def update_review(review_id: int, payload: ReviewUpdate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
@@ -24,8 +88,32 @@ def update_review(review_id: int, payload: ReviewUpdate, db: Session = Depends(g
         raise HTTPException(status_code=404, detail="Not found")
     if user.role.value == "teacher" and review.reviewer_id and review.reviewer_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
-    for field, value in payload.model_dump(exclude_unset=True).items():
-        setattr(review, field, value)
+    if review.reviewer_id is None:
+        # The AI review stays as generated; staff edits land on their own review of the essay
+        review = _staff_review_from_ai(db, review, user)
+    _apply_changes(db, review, payload.model_dump(exclude_unset=True))
+    if review.status == ReviewStatus.COMPLETED and review.completed_at is None:
+        review.completed_at = datetime.now(timezone.utc)
+    enqueue_grade(db, review)
+    db.commit()
+    db.refresh(review)
+    record_review_safely(db, review)
+    return review
+
+@router.put("/{review_id}/peer", response_model=ReviewOut)
+def update_peer_review(review_id: int, payload: PeerReviewUpdate, db: Session = Depends(get_db), user: User = Depends(require_roles("student"))):
+    review = db.query(Review).filter(Review.id == review_id).first()
+    if not review:
+        raise HTTPException(status_code=404, detail="Not found")
+    # Students may only fill in the peer reviews assigned to them
+    if review.reviewer_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    _apply_changes(db, review, payload.model_dump(exclude_unset=True))
+    # A peer review is done once it says something; clearing it reopens it
+    review.status = ReviewStatus.COMPLETED if review.has_feedback else ReviewStatus.IN_PROGRESS
+    if review.status == ReviewStatus.COMPLETED and review.completed_at is None:
+        review.completed_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(review)
-    return review
\ No newline at end of file
+    record_review_safely(db, review)
+    return review
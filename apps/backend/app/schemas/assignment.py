@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Tuple
+from datetime import datetime
+
+class AssignmentCreate(BaseModel):
+    title: str
+    reviews_per_essay: int = Field(default=3, ge=1)
+    due_at: Optional[datetime] = None
+    lms_assignment_id: Optional[str] = None
+
+class AssignmentOut(AssignmentCreate):
+    id: int
+    course_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PeerReviewRequest(BaseModel):
+    # Pairs of users who must not review each other
+    conflicts: List[Tuple[int, int]] = []
+    seed: Optional[int] = None
+
+class ReassignRequest(BaseModel):
+    dropped_user_ids: List[int]
+    conflicts: List[Tuple[int, int]] = []
+
+class PeerReviewResult(BaseModel):
+    created: int
+    removed: int = 0
+    unfilled_essay_ids: List[int] = []
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class CourseCreate(BaseModel):
+    name: str
+    lms_course_id: Optional[str] = None
+
+class CourseOut(CourseCreate):
+    id: int
+    teacher_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
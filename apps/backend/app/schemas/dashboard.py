@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, List
+from datetime import datetime
+from ..models.review import ReviewStatus
+
+class DashboardReview(BaseModel):
+    status: ReviewStatus
+    grammar_score: Optional[float] = None
+    clarity_score: Optional[float] = None
+    argument_score: Optional[float] = None
+    overall_score: Optional[float] = None
+    created_at: Optional[datetime] = None
+
+class DashboardEssay(BaseModel):
+    id: int
+    title: str
+    assignment_id: int
+    author_id: int
+    author_name: str
+    is_draft: bool
+    status: str
+    score: Optional[float] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    ai_review: Optional[DashboardReview] = None
+    teacher_review: Optional[DashboardReview] = None
+    review_counts: Dict[str, int]
+
+class DashboardOut(BaseModel):
+    status_counts: Dict[str, int]
+    essays: List[DashboardEssay]
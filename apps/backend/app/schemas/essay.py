@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Union
 from datetime import datetime
 
 class EssayBase(BaseModel):
@@ -7,17 +7,46 @@ class EssayBase(BaseModel):
     content: str
 
 class EssayCreate(EssayBase):
-    pass
+    assignment_id: Optional[int] = None
 
 class EssayUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
     is_draft: Optional[bool] = None
 
+class EssayPatch(BaseModel):
+    base_revision: int
+    # Retain (positive int), delete (negative int) and insert (str) components
+    ops: List[Union[int, str]]
+
+class EssayPatchOut(BaseModel):
+    id: int
+    revision: int
+
+class EssayRevisionOut(BaseModel):
+    revision: int
+    is_snapshot: bool
+    length: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class EssayRevisionContent(BaseModel):
+    revision: int
+    content: str
+
+class EssayDiffOut(BaseModel):
+    from_revision: int
+    to_revision: int
+    ops: List[Union[int, str]]
+
 class EssayOut(EssayBase):
     id: int
     author_id: int
+    assignment_id: Optional[int] = None
     is_draft: bool
+    revision: int
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    name: Optional[str] = None
+    points: float
+
+class LeaderboardOut(BaseModel):
+    course_id: int
+    period: str
+    entries: List[LeaderboardEntry]
+
+class StreakOut(BaseModel):
+    current: int
+    best: int
+    last_active: Optional[date] = None
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Any, Dict
+
+class LmsWebhookEvent(BaseModel):
+    event_id: str
+    type: str
+    data: Dict[str, Any] = {}
@@ -15,10 +15,22 @@ class ReviewCreate(ReviewBase):
 
 class ReviewUpdate(ReviewBase):
     status: Optional[ReviewStatus] = None
+    essay_revision: Optional[int] = None
+
+class PeerReviewUpdate(BaseModel):
+    """What a student may set on a peer review assigned to them"""
+    comments: Optional[str] = None
+    grammar_score: Optional[float] = None
+    clarity_score: Optional[float] = None
+    argument_score: Optional[float] = None
+
+    class Config:
+        extra = "forbid"
 
 class ReviewOut(ReviewBase):
     id: int
     essay_id: int
+    essay_revision: Optional[int] = None
     reviewer_id: Optional[int] = None
     status: ReviewStatus
     created_at: datetime
@@ -0,0 +1,171 @@
+from typing import Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session, aliased
+
+from ..models.assignment import Assignment
+from ..models.essay import Essay
+from ..models.review import Review, ReviewStatus
+from ..models.user import User, UserRole
+
+ESSAY_STATUSES = ("draft", "submitted", "ai_reviewed", "in_review", "graded")
+
+def _overall(review):
+    return (review.grammar_score + review.clarity_score + review.argument_score) / 3.0
+
+def _review_dict(row, prefix: str) -> Optional[dict]:
+    if row[f"{prefix}_status"] is None:
+        return None
+    return {
+        "status": row[f"{prefix}_status"],
+        "grammar_score": row[f"{prefix}_grammar"],
+        "clarity_score": row[f"{prefix}_clarity"],
+        "argument_score": row[f"{prefix}_argument"],
+        "overall_score": row[f"{prefix}_overall"],
+        "created_at": row[f"{prefix}_created_at"],
+    }
+
+def course_dashboard(
+    db: Session,
+    course_id: int,
+    assignment_id: Optional[int] = None,
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    sort: str = "updated_at",
+    descending: bool = True,
+    limit: int = 500,
+    offset: int = 0,
+) -> dict:
+    """
+    Essays of a course with their latest AI and teacher review and the class-wide status
+    counts, built from one query regardless of class size.
+    """
+    staff = aliased(User)
+    ai = aliased(Review)
+    graded = aliased(Review)
+    staff_ids = select(staff.id).where(staff.role.in_((UserRole.TEACHER, UserRole.ADMIN)))
+    course_essay_ids = select(Essay.id).join(Assignment, Assignment.id == Essay.assignment_id).where(Assignment.course_id == course_id)
+    # One grouped pass over the course's reviews finds each essay's newest AI and staff
+    # review and its per-status counts; newest is the highest id, which follows insertion
+    per_essay = (
+        select(
+            Review.essay_id,
+            func.max(case((Review.reviewer_id.is_(None), Review.id))).label("ai_id"),
+            func.max(case((Review.reviewer_id.in_(staff_ids), Review.id))).label("teacher_id"),
+            *[
+                func.sum(case((and_(Review.reviewer_id.isnot(None), Review.status == s), 1), else_=0)).label(s.value)
+                for s in ReviewStatus
+            ],
+        )
+        .where(Review.essay_id.in_(course_essay_ids))
+        .group_by(Review.essay_id)
+        .subquery()
+    )
+
+    score = func.coalesce(_overall(graded), _overall(ai))
+    essay_status = case(
+        (Essay.is_draft.is_(True), "draft"),
+        (graded.status == ReviewStatus.COMPLETED, "graded"),
+        (graded.status.isnot(None), "in_review"),
+        (ai.status.isnot(None), "ai_reviewed"),
+        else_="submitted",
+    )
+
+    base = (
+        select(Essay.id)
+        .join(Assignment, Assignment.id == Essay.assignment_id)
+        .join(User, User.id == Essay.author_id)
+        .outerjoin(per_essay, per_essay.c.essay_id == Essay.id)
+        .outerjoin(ai, ai.id == per_essay.c.ai_id)
+        .outerjoin(graded, graded.id == per_essay.c.teacher_id)
+        .where(Assignment.course_id == course_id)
+    )
+    if assignment_id is not None:
+        base = base.where(Essay.assignment_id == assignment_id)
+
+    # Every course row with its derived columns and, as window sums over the unfiltered
+    # set, the class-wide status counts, so filtering and paging stay in the same query
+    rows_source = base.with_only_columns(
+        Essay.id.label("id"),
+        Essay.title.label("title"),
+        Essay.assignment_id.label("assignment_id"),
+        Essay.author_id.label("author_id"),
+        User.first_name.label("first_name"),
+        User.last_name.label("last_name"),
+        Essay.is_draft.label("is_draft"),
+        Essay.created_at.label("created_at"),
+        Essay.updated_at.label("updated_at"),
+        func.coalesce(Essay.updated_at, Essay.created_at).label("last_activity"),
+        essay_status.label("status"),
+        score.label("score"),
+        ai.status.label("ai_status"),
+        ai.grammar_score.label("ai_grammar"),
+        ai.clarity_score.label("ai_clarity"),
+        ai.argument_score.label("ai_argument"),
+        _overall(ai).label("ai_overall"),
+        ai.created_at.label("ai_created_at"),
+        graded.status.label("teacher_status"),
+        graded.grammar_score.label("teacher_grammar"),
+        graded.clarity_score.label("teacher_clarity"),
+        graded.argument_score.label("teacher_argument"),
+        _overall(graded).label("teacher_overall"),
+        graded.created_at.label("teacher_created_at"),
+        *[per_essay.c[s.value] for s in ReviewStatus],
+        *[
+            func.sum(case((essay_status == name, 1), else_=0)).over().label(f"count_{name}")
+            for name in ESSAY_STATUSES
+        ],
+    ).subquery()
+    rows_query = select(rows_source)
+    if status is not None:
+        rows_query = rows_query.where(rows_source.c.status == status)
+    if min_score is not None:
+        rows_query = rows_query.where(rows_source.c.score >= min_score)
+    if max_score is not None:
+        rows_query = rows_query.where(rows_source.c.score <= max_score)
+
+    sort_column = {
+        "score": rows_source.c.score,
+        "status": rows_source.c.status,
+        "updated_at": rows_source.c.last_activity,
+        "author": rows_source.c.last_name,
+        "title": rows_source.c.title,
+    }[sort]
+    order = sort_column.desc() if descending else sort_column.asc()
+    rows = db.execute(
+        rows_query.order_by(order.nulls_last(), rows_source.c.id).limit(limit).offset(offset)
+    ).mappings().all()
+
+    if rows:
+        counts_row = rows[0]
+    else:
+        # Nothing on this page to carry the window sums, so count on their own
+        counts_row = db.execute(select(*[rows_source.c[f"count_{name}"] for name in ESSAY_STATUSES]).limit(1)).mappings().first()
+    status_counts = {
+        name: int(counts_row[f"count_{name}"])
+        for name in ESSAY_STATUSES
+        if counts_row and counts_row[f"count_{name}"]
+    }
+
+    return {
+        "status_counts": status_counts,
+        "essays": [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "assignment_id": row["assignment_id"],
+                "author_id": row["author_id"],
+                "author_name": f"{row['first_name']} {row['last_name']}",
+                "is_draft": row["is_draft"],
+                "status": row["status"],
+                "score": row["score"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+                "ai_review": _review_dict(row, "ai"),
+                "teacher_review": _review_dict(row, "teacher"),
+                "review_counts": {s.value: int(row[s.value] or 0) for s in ReviewStatus},
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,102 @@
+from typing import Iterable, List
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.essay import Essay
+from .essay_history import add_delta, add_snapshot, latest_length, maybe_snapshot, pending_ops
+from .text_ops import Op, OperationError, apply, base_length, diff, normalize, target_length
+
+class EditConflict(Exception):
+    def __init__(self, revision: int):
+        super().__init__(f"Base revision is stale; current revision is {revision}")
+        self.revision = revision
+
+def _head_length(db: Session, essay_id: int) -> int:
+    length = latest_length(db, essay_id)
+    if length is None:
+        # Essays saved before history existed get their baseline snapshot on first change
+        essay = db.query(Essay).filter(Essay.id == essay_id).one()
+        length = add_snapshot(db, essay_id, essay.revision, essay.content).length
+    return length
+
+def _bump(db: Session, essay_id: int, base_revision: int, **values) -> int:
+    # Optimistic concurrency: only one writer can move the essay off base_revision
+    bumped = (
+        db.query(Essay)
+        .filter(Essay.id == essay_id, Essay.revision == base_revision)
+        .update({Essay.revision: Essay.revision + 1, **values}, synchronize_session=False)
+    )
+    if not bumped:
+        db.rollback()
+        current = db.query(Essay.revision).filter(Essay.id == essay_id).scalar()
+        raise EditConflict(current)
+    return base_revision + 1
+
+def record_edit(db: Session, essay_id: int, base_revision: int, ops: List[Op]) -> int:
+    """
+    Append a text operation made against base_revision and return the new revision.
+    Only the compressed operation is written; Essay.content is rewritten once enough edits pile up.
+    """
+    ops = normalize(ops)
+    if not ops:
+        # Idle autosaves change nothing, so they write nothing
+        current = db.query(Essay.revision).filter(Essay.id == essay_id).scalar()
+        if current != base_revision:
+            raise EditConflict(current)
+        return current
+    length = _head_length(db, essay_id)
+    if base_length(ops) > length:
+        raise OperationError("Operation spans past the end of the document")
+
+    revision = _bump(db, essay_id, base_revision)
+    add_delta(db, essay_id, revision, ops, length + target_length(ops) - base_length(ops))
+    db.commit()
+
+    content_revision = db.query(Essay.content_revision).filter(Essay.id == essay_id).scalar()
+    if revision - content_revision >= settings.essay_edit_fold_threshold:
+        fold_pending_edits(db, db.query(Essay).filter(Essay.id == essay_id).one())
+    return revision
+
+def replace_content(db: Session, essay: Essay, content: str) -> None:
+    """Record a whole-content replacement as a delta from the current text"""
+    fold_pending_edits(db, essay)
+    ops = diff(essay.content, content)
+    if not ops:
+        return
+    _head_length(db, essay.id)
+    revision = _bump(db, essay.id, essay.revision, content=content, content_revision=essay.revision + 1)
+    add_delta(db, essay.id, revision, ops, len(content))
+    maybe_snapshot(db, essay.id, revision, content)
+
+def fold_pending_edits(db: Session, essay: Essay) -> None:
+    """Compose the revisions newer than Essay.content and write the result into it"""
+    start, upto = essay.content_revision, essay.revision
+    if start >= upto:
+        return
+    content = apply(essay.content, pending_ops(db, essay.id, start, upto))
+    # A concurrent fold of the same revisions makes this match no rows. Folding doesn't
+    # change what readers see, so version and updated_at are left alone to keep caches valid.
+    folded = (
+        db.query(Essay)
+        .filter(Essay.id == essay.id, Essay.content_revision == start)
+        .update(
+            {
+                Essay.content: content,
+                Essay.content_revision: upto,
+                Essay.version: Essay.version,
+                Essay.updated_at: Essay.updated_at,
+            },
+            synchronize_session=False,
+        )
+    )
+    if folded:
+        maybe_snapshot(db, essay.id, upto, content)
+    db.commit()
+    db.refresh(essay)
+
+def fold_pending_edits_for(db: Session, essays: Iterable[Essay]) -> None:
+    """Bring Essay.content up to date for every essay that has pending edits"""
+    for essay in essays:
+        if essay.content_revision < essay.revision:
+            fold_pending_edits(db, essay)
@@ -0,0 +1,83 @@
+import json
+import zlib
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.essay_revision import EssayRevision
+from .text_ops import Op, apply, compose
+
+def pack_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+def unpack_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+def pack_ops(ops: List[Op]) -> bytes:
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+def unpack_ops(data: bytes) -> List[Op]:
+    return json.loads(zlib.decompress(data))
+
+def add_snapshot(db: Session, essay_id: int, revision: int, text: str) -> EssayRevision:
+    row = EssayRevision(essay_id=essay_id, revision=revision, is_snapshot=True, data=pack_text(text), length=len(text))
+    db.add(row)
+    return row
+
+def add_delta(db: Session, essay_id: int, revision: int, ops: List[Op], length: int) -> EssayRevision:
+    row = EssayRevision(essay_id=essay_id, revision=revision, is_snapshot=False, data=pack_ops(ops), length=length)
+    db.add(row)
+    return row
+
+def latest_length(db: Session, essay_id: int) -> Optional[int]:
+    """Document length at the newest recorded revision, without loading its data"""
+    return (
+        db.query(EssayRevision.length)
+        .filter(EssayRevision.essay_id == essay_id)
+        .order_by(EssayRevision.revision.desc())
+        .limit(1)
+        .scalar()
+    )
+
+def pending_ops(db: Session, essay_id: int, after: int, upto: Optional[int] = None) -> List[Op]:
+    """Compose the deltas of revisions in (after, upto] into one operation"""
+    query = db.query(EssayRevision.data).filter(EssayRevision.essay_id == essay_id, EssayRevision.revision > after)
+    if upto is not None:
+        query = query.filter(EssayRevision.revision <= upto)
+    ops: List[Op] = []
+    for (data,) in query.order_by(EssayRevision.revision).all():
+        ops = compose(ops, unpack_ops(data))
+    return ops
+
+def maybe_snapshot(db: Session, essay_id: int, revision: int, text: str) -> None:
+    """Turn the row for revision into a snapshot if the delta chain behind it has grown too long"""
+    last = (
+        db.query(EssayRevision.revision)
+        .filter(EssayRevision.essay_id == essay_id, EssayRevision.is_snapshot.is_(True))
+        .order_by(EssayRevision.revision.desc())
+        .first()
+    )
+    if last and revision - last[0] < settings.essay_snapshot_interval:
+        return
+    db.query(EssayRevision).filter(EssayRevision.essay_id == essay_id, EssayRevision.revision == revision).update(
+        {EssayRevision.is_snapshot: True, EssayRevision.data: pack_text(text)}, synchronize_session=False
+    )
+
+def reconstruct(db: Session, essay_id: int, revision: int) -> Optional[str]:
+    """Rebuild the text of a revision from the nearest snapshot at or before it"""
+    snapshot = (
+        db.query(EssayRevision)
+        .filter(
+            EssayRevision.essay_id == essay_id,
+            EssayRevision.revision <= revision,
+            EssayRevision.is_snapshot.is_(True),
+        )
+        .order_by(EssayRevision.revision.desc())
+        .first()
+    )
+    if not snapshot:
+        return None
+    if not db.query(EssayRevision.id).filter(EssayRevision.essay_id == essay_id, EssayRevision.revision == revision).first():
+        return None
+    return apply(unpack_text(snapshot.data), pending_ops(db, essay_id, snapshot.revision, revision))
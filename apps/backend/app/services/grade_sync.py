@@ -0,0 +1,289 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from ..config import settings
+from ..models.assignment import Assignment
+from ..models.course import Course
+from ..models.essay import Essay
+from ..models.grade_outbox import GradeOutbox, OutboxStatus
+from ..models.lms_event import LmsEvent
+from ..models.review import Review, ReviewStatus
+from ..models.user import User, UserRole
+
+# Statuses worth retrying; any other 4xx means the batch itself is wrong
+RETRYABLE_STATUS = {408, 409, 425, 429}
+KEY_PREFIX = "writewise-grade-"
+
+def lms_client() -> httpx.Client:
+    headers = {"Authorization": f"Bearer {settings.lms_api_token}"} if settings.lms_api_token else {}
+    return httpx.Client(base_url=settings.lms_base_url, headers=headers, timeout=10.0)
+
+def enqueue_grade(db: Session, review: Review) -> Optional[GradeOutbox]:
+    """
+    Stage a completed teacher review's grade for the LMS. Runs inside the caller's
+    transaction so the grade is queued if and only if the review change commits. Older
+    unsent grades for the same student and assignment are superseded.
+    """
+    if review.status != ReviewStatus.COMPLETED:
+        return None
+    scores = (review.grammar_score, review.clarity_score, review.argument_score)
+    if any(score is None for score in scores) or review.reviewer_id is None:
+        return None
+    reviewer_role = db.query(User.role).filter(User.id == review.reviewer_id).scalar()
+    if reviewer_role not in (UserRole.TEACHER, UserRole.ADMIN):
+        return None
+    target = (
+        db.query(Essay.author_id, User.email, Assignment.id, Assignment.lms_assignment_id, Course.lms_course_id)
+        .join(User, User.id == Essay.author_id)
+        .join(Assignment, Assignment.id == Essay.assignment_id)
+        .join(Course, Course.id == Assignment.course_id)
+        .filter(Essay.id == review.essay_id)
+        .first()
+    )
+    if not target or not target.lms_assignment_id or not target.lms_course_id:
+        return None
+    score = round(sum(scores) / len(scores), 2)
+    # Comment-only edits keep the grade; a failed grade is resent on the next save
+    last_score = (
+        db.query(GradeOutbox.score)
+        .filter(
+            GradeOutbox.review_id == review.id,
+            GradeOutbox.status.in_((OutboxStatus.PENDING, OutboxStatus.IN_FLIGHT, OutboxStatus.SENT)),
+        )
+        .order_by(GradeOutbox.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    if last_score == score:
+        return None
+
+    db.query(GradeOutbox).filter(
+        GradeOutbox.assignment_id == target.id,
+        GradeOutbox.student_id == target.author_id,
+        GradeOutbox.status == OutboxStatus.PENDING,
+    ).update({GradeOutbox.status: OutboxStatus.SUPERSEDED}, synchronize_session=False)
+
+    entry = GradeOutbox(
+        review_id=review.id,
+        assignment_id=target.id,
+        student_id=target.author_id,
+        student_email=target.email,
+        lms_course_id=target.lms_course_id,
+        lms_assignment_id=target.lms_assignment_id,
+        score=score,
+        status=OutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(entry)
+    return entry
+
+def _backoff(attempts: int, retry_after: Optional[float] = None) -> timedelta:
+    delay = min(settings.lms_retry_base_seconds * 2 ** (attempts - 1), 3600.0)
+    # Jitter spreads retries so a recovering LMS isn't hit by every course at once
+    delay *= 0.5 + random.random()
+    return timedelta(seconds=max(delay, retry_after or 0.0))
+
+# Outcome of one grade push: ("sent" | "retry" | "failed", error, Retry-After seconds)
+Outcome = Tuple[str, Optional[str], Optional[float]]
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+def _push(client: httpx.Client, lms_course_id: str, batch: List[dict]) -> Dict[int, Outcome]:
+    """POST one batch of grades and map each outbox id to its outcome; touches no database state"""
+    payload = {"grades": [{key: value for key, value in grade.items() if key != "id"} for grade in batch]}
+    try:
+        response = client.post(f"/courses/{lms_course_id}/grades", json=payload)
+    except httpx.HTTPError as exc:
+        return {grade["id"]: ("retry", f"{type(exc).__name__}: {exc}", None) for grade in batch}
+
+    if response.status_code >= 500 or response.status_code in RETRYABLE_STATUS:
+        retry_after = _retry_after(response)
+        return {grade["id"]: ("retry", f"HTTP {response.status_code}", retry_after) for grade in batch}
+    if response.status_code >= 400:
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
+        return {grade["id"]: ("failed", error, None) for grade in batch}
+
+    # The LMS may report per-grade outcomes; grades it doesn't mention were accepted
+    try:
+        results = {item["idempotency_key"]: item for item in response.json().get("results", [])}
+    except (ValueError, AttributeError, KeyError, TypeError):
+        results = {}
+    outcomes: Dict[int, Outcome] = {}
+    for grade in batch:
+        result = results.get(grade["idempotency_key"])
+        if result is None or result.get("status") == "ok":
+            outcomes[grade["id"]] = ("sent", None, None)
+        elif result.get("retryable"):
+            outcomes[grade["id"]] = ("retry", str(result.get("error")), None)
+        else:
+            outcomes[grade["id"]] = ("failed", str(result.get("error")), None)
+    return outcomes
+
+def _newest_ids(db: Session, entries: List[GradeOutbox]) -> Dict[tuple, int]:
+    """Newest live outbox id per student and assignment among those the entries belong to"""
+    if not entries:
+        return {}
+    rows = (
+        db.query(GradeOutbox.assignment_id, GradeOutbox.student_id, func.max(GradeOutbox.id))
+        .filter(
+            GradeOutbox.assignment_id.in_({entry.assignment_id for entry in entries}),
+            GradeOutbox.student_id.in_({entry.student_id for entry in entries}),
+            GradeOutbox.status != OutboxStatus.SUPERSEDED,
+        )
+        .group_by(GradeOutbox.assignment_id, GradeOutbox.student_id)
+        .all()
+    )
+    return {(assignment_id, student_id): newest for assignment_id, student_id, newest in rows}
+
+def _record(entry: GradeOutbox, outcome: Outcome, now: datetime, stats: Dict[str, int], superseded: bool = False) -> None:
+    kind, error, retry_after = outcome
+    entry.leased_until = None
+    if kind == "sent":
+        entry.status = OutboxStatus.SENT
+        entry.sent_at = now
+        entry.last_error = None
+        stats["sent"] += 1
+        return
+    entry.attempts += 1
+    entry.last_error = error
+    if superseded:
+        # A regrade was queued while this one was in flight; resending the old score would overwrite it
+        entry.status = OutboxStatus.SUPERSEDED
+        stats["superseded"] += 1
+    # Retry-After only stretches the delay; an LMS that rate limits forever still hits the cap
+    elif kind == "retry" and entry.attempts < settings.lms_max_attempts:
+        entry.status = OutboxStatus.PENDING
+        entry.next_attempt_at = now + _backoff(entry.attempts, retry_after)
+        stats["retried"] += 1
+    else:
+        entry.status = OutboxStatus.FAILED
+        stats["failed"] += 1
+
+def _claim(db: Session, now: datetime, limit: int, stats: Dict[str, int]) -> Dict[str, List[dict]]:
+    """Lease due grades to this dispatcher and commit, so no row lock outlives the claim"""
+    leased = aliased(GradeOutbox)
+    entries = (
+        db.query(GradeOutbox)
+        .filter(
+            or_(
+                and_(
+                    GradeOutbox.status == OutboxStatus.PENDING,
+                    or_(GradeOutbox.next_attempt_at.is_(None), GradeOutbox.next_attempt_at <= now),
+                ),
+                # A dispatcher that died mid-send leaves its lease to expire
+                and_(GradeOutbox.status == OutboxStatus.IN_FLIGHT, GradeOutbox.leased_until <= now),
+            ),
+            # Grades of a student another dispatcher is still sending wait for that send to
+            # settle, so the LMS sees them in order
+            ~exists().where(
+                leased.assignment_id == GradeOutbox.assignment_id,
+                leased.student_id == GradeOutbox.student_id,
+                leased.id != GradeOutbox.id,
+                leased.status == OutboxStatus.IN_FLIGHT,
+                leased.leased_until > now,
+            ),
+        )
+        .order_by(GradeOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    # Only the newest grade per student and assignment is worth sending, including grades
+    # already sent; an expired lease must not resend a score a regrade replaced
+    newest = _newest_ids(db, entries)
+    latest: List[GradeOutbox] = []
+    for entry in entries:
+        if entry.id == newest[(entry.assignment_id, entry.student_id)]:
+            latest.append(entry)
+        else:
+            entry.status = OutboxStatus.SUPERSEDED
+            entry.leased_until = None
+            stats["superseded"] += 1
+
+    leased_until = now + timedelta(seconds=settings.lms_lease_seconds)
+    by_course: Dict[str, List[dict]] = defaultdict(list)
+    for entry in latest:
+        entry.status = OutboxStatus.IN_FLIGHT
+        entry.leased_until = leased_until
+        by_course[entry.lms_course_id].append({
+            "id": entry.id,
+            "idempotency_key": entry.idempotency_key,
+            "assignment_id": entry.lms_assignment_id,
+            "student": entry.student_email,
+            "score": entry.score,
+            "max_score": 10,
+        })
+    db.commit()
+    return by_course
+
+def dispatch_pending(db: Session, client: httpx.Client, limit: int = 5000) -> Dict[str, int]:
+    """
+    Push due outbox grades to the LMS in per-course batches and record the outcome of each.
+    Rows are leased and committed before any HTTP call and the outcomes are written in a
+    second short transaction, so review writes never wait on the LMS.
+    """
+    stats = {"batches": 0, "sent": 0, "retried": 0, "failed": 0, "superseded": 0}
+    by_course = _claim(db, datetime.now(timezone.utc), limit, stats)
+
+    outcomes: Dict[int, Outcome] = {}
+    for lms_course_id, grades in by_course.items():
+        for start in range(0, len(grades), settings.lms_batch_size):
+            stats["batches"] += 1
+            outcomes.update(_push(client, lms_course_id, grades[start:start + settings.lms_batch_size]))
+    if not outcomes:
+        return stats
+
+    now = datetime.now(timezone.utc)
+    # Rows a webhook already settled while the batch was in flight are left as they are
+    entries = (
+        db.query(GradeOutbox)
+        .filter(GradeOutbox.id.in_(outcomes), GradeOutbox.status == OutboxStatus.IN_FLIGHT)
+        .with_for_update()
+        .all()
+    )
+    newest = _newest_ids(db, entries)
+    for entry in entries:
+        superseded = entry.id != newest[(entry.assignment_id, entry.student_id)]
+        _record(entry, outcomes[entry.id], now, stats, superseded)
+    db.commit()
+    return stats
+
+def _outbox_entry(db: Session, key: Optional[str]) -> Optional[GradeOutbox]:
+    if not key or not key.startswith(KEY_PREFIX) or not key[len(KEY_PREFIX):].isdigit():
+        return None
+    return db.query(GradeOutbox).filter(GradeOutbox.id == int(key[len(KEY_PREFIX):])).first()
+
+def handle_webhook(db: Session, event_id: str, event_type: str, data: dict) -> bool:
+    """Apply an LMS webhook event once; returns False for a redelivery that was already handled"""
+    db.add(LmsEvent(event_id=event_id, event_type=event_type, payload=data))
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return False
+
+    if event_type in ("grade.accepted", "grade.rejected"):
+        entry = _outbox_entry(db, data.get("idempotency_key"))
+        if entry and entry.status != OutboxStatus.SUPERSEDED:
+            if event_type == "grade.accepted":
+                entry.status = OutboxStatus.SENT
+                entry.sent_at = entry.sent_at or datetime.now(timezone.utc)
+                entry.last_error = None
+            else:
+                entry.status = OutboxStatus.FAILED
+                entry.last_error = str(data.get("reason") or "Rejected by LMS")
+    db.commit()
+    return True
@@ -0,0 +1,370 @@
+import json
+import logging
+import random
+import threading
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.assignment import Assignment
+from ..models.essay import Essay
+from ..models.review import Review, ReviewStatus
+from ..models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+PEER_REVIEW_POINTS = 10
+PERIODS = ("all", "week", "month")
+
+Entry = Tuple[str, float]  # (member, score)
+
+def board_key(course_id: int, period: str, when: Optional[datetime] = None) -> str:
+    when = when or datetime.now(timezone.utc)
+    if period == "week":
+        year, week, _ = when.isocalendar()
+        return f"lb:course:{course_id}:week:{year}-W{week:02d}"
+    if period == "month":
+        return f"lb:course:{course_id}:month:{when.year}-{when.month:02d}"
+    return f"lb:course:{course_id}:all"
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width = [1] * levels
+
+class _IndexableSkipList:
+    """Sorted keys with O(log n) insert, remove, rank-of-key and key-at-rank"""
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self.tail = _Node(None, 0)
+        self.head = _Node(None, self.MAX_LEVELS)
+        self.head.next = [self.tail] * self.MAX_LEVELS
+        self.size = 0
+
+    def _path(self, key) -> Tuple[List[_Node], List[int]]:
+        """Last node before key on each level, and the positions of those nodes"""
+        chain = [self.head] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node, pos = self.head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self.tail and node.next[level].key < key:
+                pos += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = pos
+        return chain, positions
+
+    def insert(self, key) -> None:
+        chain, positions = self._path(key)
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        node = _Node(key, levels)
+        pos = positions[0] + 1
+        for level in range(levels):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = positions[level] + prev.width[level] - pos + 1
+            prev.width[level] = pos - positions[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key) -> None:
+        chain, _ = self._path(key)
+        target = chain[0].next[0]
+        if target is self.tail or target.key != key:
+            raise KeyError(key)
+        for level in range(self.MAX_LEVELS):
+            prev = chain[level]
+            if level < len(target.next) and prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key) -> int:
+        chain, positions = self._path(key)
+        if chain[0].next[0] is self.tail or chain[0].next[0].key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def at(self, index: int):
+        node, remaining = self.head, index + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining and node.next[level] is not self.tail:
+                remaining -= node.width[level]
+                node = node.next[level]
+                if remaining == 0:
+                    return node.key
+        raise IndexError(index)
+
+class InMemoryLeaderboardStore:
+    """
+    Process-local stand-in for the Redis store, ordering ties the way sorted sets do.
+    Only consistent when a single process serves all review writes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards: Dict[str, Tuple[_IndexableSkipList, Dict[str, float]]] = {}
+        self._awards: Dict[str, dict] = {}
+        self._streaks: Dict[str, Dict[str, int]] = {}
+
+    def _board(self, key: str):
+        if key not in self._boards:
+            self._boards[key] = (_IndexableSkipList(), {})
+        return self._boards[key]
+
+    def _incr(self, key: str, member: str, delta: float) -> None:
+        ranking, scores = self._board(key)
+        if member in scores:
+            ranking.remove((scores[member], member))
+        scores[member] = scores.get(member, 0.0) + delta
+        ranking.insert((scores[member], member))
+
+    def top(self, key: str, k: int) -> List[Entry]:
+        with self._lock:
+            ranking, _ = self._board(key)
+            return [
+                (member, score)
+                for score, member in (ranking.at(ranking.size - 1 - i) for i in range(min(k, ranking.size)))
+            ]
+
+    def around(self, key: str, member: str, radius: int) -> Tuple[Optional[int], List[Entry]]:
+        with self._lock:
+            ranking, scores = self._board(key)
+            if member not in scores:
+                return None, []
+            rank = ranking.size - 1 - ranking.rank((scores[member], member))
+            start = max(rank - radius, 0)
+            stop = min(rank + radius, ranking.size - 1)
+            entries = [ranking.at(ranking.size - 1 - i) for i in range(start, stop + 1)]
+            return start, [(m, s) for s, m in entries]
+
+    def apply_award(self, review_id: int, member: str, boards: List[str], points: int, streak: Optional[Tuple[int, int]]) -> int:
+        """Same contract as RedisLeaderboardStore.apply_award, made atomic by the store lock"""
+        with self._lock:
+            award = self._awards.get(str(review_id))
+            if award is None:
+                if not points:
+                    return 0
+                award = {"member": member, "points": 0, "boards": list(boards)}
+            delta = points - award["points"]
+            if not delta:
+                return 0
+            for key in award["boards"]:
+                self._incr(key, award["member"], delta)
+            if streak and award["points"] == 0:
+                self._touch_streak(*streak)
+            self._awards[str(review_id)] = {**award, "points": points}
+            return delta
+
+    def _touch_streak(self, user_id: int, day: int) -> None:
+        streak = self._streaks.setdefault(str(user_id), {"last": -1, "current": 0, "best": 0})
+        if day <= streak["last"]:
+            return
+        streak["current"] = streak["current"] + 1 if day == streak["last"] + 1 else 1
+        streak["best"] = max(streak["best"], streak["current"])
+        streak["last"] = day
+
+    def get_streak(self, user_id: int) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._streaks.get(str(user_id), {"last": -1, "current": 0, "best": 0}))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._boards.clear()
+            self._awards.clear()
+            self._streaks.clear()
+
+# Day numbers are date ordinals; out-of-order or repeated days leave the streak alone
+_TOUCH_STREAK = """
+local function touch_streak(key, day)
+  local last = tonumber(redis.call('HGET', key, 'last') or '-1')
+  if day <= last then return end
+  local current = tonumber(redis.call('HGET', key, 'current') or '0')
+  local best = tonumber(redis.call('HGET', key, 'best') or '0')
+  if day == last + 1 then current = current + 1 else current = 1 end
+  if current > best then best = current end
+  redis.call('HSET', key, 'last', day, 'current', current, 'best', best)
+end
+"""
+
+# KEYS: awards hash, streak hash (or ""). ARGV: review id, points, member, boards as JSON, streak day.
+# Reading the previous award, applying the difference and storing the new award happen
+# in one script so concurrent or retried writes of a review can't count it twice.
+_APPLY_AWARD = _TOUCH_STREAK + """
+local previous = redis.call('HGET', KEYS[1], ARGV[1])
+local points = tonumber(ARGV[2])
+local award
+if previous then
+  award = cjson.decode(previous)
+elseif points == 0 then
+  return 0
+else
+  award = {member = ARGV[3], points = 0, boards = cjson.decode(ARGV[4])}
+end
+local delta = points - tonumber(award.points)
+if delta == 0 then return 0 end
+for _, key in ipairs(award.boards) do
+  redis.call('ZINCRBY', key, delta, award.member)
+end
+if KEYS[2] ~= '' and tonumber(award.points) == 0 then
+  touch_streak(KEYS[2], tonumber(ARGV[5]))
+end
+award.points = points
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(award))
+return delta
+"""
+
+class RedisLeaderboardStore:
+    """Leaderboards as Redis sorted sets: ZINCRBY, ZREVRANK and ZREVRANGE are all O(log n)"""
+
+    def __init__(self, client):
+        self.redis = client
+        self._apply_award = client.register_script(_APPLY_AWARD)
+
+    def top(self, key: str, k: int) -> List[Entry]:
+        return [(m.decode(), s) for m, s in self.redis.zrevrange(key, 0, k - 1, withscores=True)]
+
+    def around(self, key: str, member: str, radius: int) -> Tuple[Optional[int], List[Entry]]:
+        rank = self.redis.zrevrank(key, member)
+        if rank is None:
+            return None, []
+        start = max(rank - radius, 0)
+        entries = self.redis.zrevrange(key, start, rank + radius, withscores=True)
+        return start, [(m.decode(), s) for m, s in entries]
+
+    def apply_award(self, review_id: int, member: str, boards: List[str], points: int, streak: Optional[Tuple[int, int]]) -> int:
+        """
+        Move review_id's award to points and return the difference applied. A new award goes
+        to member on boards; an existing one keeps the member and boards it was first given.
+        streak is (user_id, day) to extend when the review starts earning points.
+        """
+        streak_key = f"lb:streak:{streak[0]}" if streak else ""
+        day = streak[1] if streak else 0
+        return int(self._apply_award(
+            keys=["lb:awards", streak_key],
+            args=[review_id, points, member, json.dumps(boards), day],
+        ))
+
+    def get_streak(self, user_id: int) -> Dict[str, int]:
+        raw = self.redis.hgetall(f"lb:streak:{user_id}")
+        streak = {"last": -1, "current": 0, "best": 0}
+        streak.update({k.decode(): int(v) for k, v in raw.items()})
+        return streak
+
+    def clear(self) -> None:
+        keys = list(self.redis.scan_iter("lb:*", count=1000))
+        for start in range(0, len(keys), 1000):
+            self.redis.delete(*keys[start:start + 1000])
+
+@lru_cache
+def get_leaderboard_store():
+    if settings.leaderboard_backend == "redis":
+        import redis
+        return RedisLeaderboardStore(redis.Redis.from_url(settings.redis_url))
+    return InMemoryLeaderboardStore()
+
+def _target(db: Session, review: Review):
+    """(course_id, author_id, reviewer_role) for a review, or None when it can't score"""
+    if review.reviewer_id is None:
+        return None
+    return (
+        db.query(Assignment.course_id, Essay.author_id, User.role)
+        .join(Essay, Essay.assignment_id == Assignment.id)
+        .join(User, User.id == review.reviewer_id)
+        .filter(Essay.id == review.essay_id)
+        .first()
+    )
+
+def _award(review: Review, author_id: int, reviewer_role: UserRole) -> Tuple[int, int]:
+    """(user_id, points) a review is worth: peer reviewers earn a flat amount, authors their teacher grade"""
+    completed = review.status == ReviewStatus.COMPLETED
+    if reviewer_role == UserRole.STUDENT:
+        # A review completed without a comment or score earns nothing, and no streak day
+        return review.reviewer_id, PEER_REVIEW_POINTS if completed and review.has_feedback else 0
+    scores = (review.grammar_score, review.clarity_score, review.argument_score)
+    if not completed or any(score is None for score in scores):
+        return author_id, 0
+    return author_id, round(sum(scores) / len(scores) * 10)
+
+def record_review(db: Session, review: Review, store=None, when: Optional[datetime] = None, target=None) -> None:
+    """
+    Bring the leaderboards in line with a review's current state. The points already
+    awarded for the review are remembered with the boards they went to, so re-grading
+    applies only the difference and keeps it in the original period.
+    """
+    store = store or get_leaderboard_store()
+    when = when or review.completed_at or datetime.now(timezone.utc)
+    target = target or _target(db, review)
+    if not target:
+        return
+    course_id, author_id, reviewer_role = target
+    user_id, points = _award(review, author_id, reviewer_role)
+
+    boards = [board_key(course_id, period, when) for period in PERIODS]
+    # Streaks count days on which a student finished a peer review
+    streak = (review.reviewer_id, when.date().toordinal()) if reviewer_role == UserRole.STUDENT else None
+    store.apply_award(review.id, str(user_id), boards, points, streak)
+
+def record_review_safely(db: Session, review: Review) -> None:
+    """Leaderboards are derived data: a store outage must not fail the review write"""
+    try:
+        record_review(db, review)
+    except Exception:
+        logger.exception("Leaderboard update failed for review %s; run the rebuild to resync", review.id)
+
+def current_streak(store, user_id: int, today: Optional[date] = None) -> Dict[str, object]:
+    streak = store.get_streak(user_id)
+    today = today or datetime.now(timezone.utc).date()
+    # A streak survives until a full day passes without a completed review
+    active = streak["last"] >= (today - timedelta(days=1)).toordinal()
+    return {
+        "current": streak["current"] if active else 0,
+        "best": streak["best"],
+        "last_active": date.fromordinal(streak["last"]) if streak["last"] > 0 else None,
+    }
+
+def rebuild_from_db(db: Session, store=None) -> int:
+    """Recompute every leaderboard and streak by replaying completed reviews in order"""
+    store = store or get_leaderboard_store()
+    store.clear()
+    # Same award time as the live path; reviews completed before completed_at existed fall back
+    done_at = func.coalesce(Review.completed_at, Review.updated_at, Review.created_at)
+    reviews = (
+        db.query(Review, done_at, Assignment.course_id, Essay.author_id, User.role)
+        .join(Essay, Essay.id == Review.essay_id)
+        .join(Assignment, Assignment.id == Essay.assignment_id)
+        .join(User, User.id == Review.reviewer_id)
+        .filter(Review.status == ReviewStatus.COMPLETED)
+        .order_by(done_at, Review.id)
+        .populate_existing()
+        .yield_per(1000)
+    )
+    count = 0
+    for review, when, course_id, author_id, reviewer_role in reviews:
+        record_review(db, review, store, when, target=(course_id, author_id, reviewer_role))
+        count += 1
+    return count
+
+if __name__ == "__main__":
+    from ..db import SessionLocal
+    from .. import models  # noqa: F401
+
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt leaderboards from {rebuild_from_db(session)} completed reviews")
+    finally:
+        session.close()
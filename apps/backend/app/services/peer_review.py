@@ -0,0 +1,202 @@
+import heapq
+import random
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from ..models.essay import Essay
+from ..models.review import Review, ReviewStatus
+
+Pair = Tuple[int, int]  # (user_id, essay_id)
+
+class AssignmentError(ValueError):
+    pass
+
+def _conflict_set(conflicts: Iterable[Iterable[int]]) -> Set[FrozenSet[int]]:
+    return {frozenset(pair) for pair in conflicts if len(set(pair)) == 2}
+
+def assign_reviewers(
+    essays: List[Pair],
+    k: int,
+    conflicts: Iterable[Iterable[int]] = (),
+    seed: Optional[int] = None,
+) -> Tuple[List[Pair], List[int]]:
+    """
+    Give every essay k peer reviewers drawn from the essay authors.
+
+    essays is a list of (author_id, essay_id), one essay per author. Authors are placed on a
+    shuffled ring and each reviews the essays of the next k authors, which gives every
+    student exactly k reviews to write, never their own essay and, for k < n / 2, no
+    reciprocal pairs. Pairs that hit a conflict are then repaired by swapping essays with
+    another random pair. Runs in O(n * k).
+
+    Returns (pairs, essay ids left short of k reviewers because no valid swap was found).
+    """
+    n = len(essays)
+    if k < 1:
+        raise AssignmentError("reviews_per_essay must be at least 1")
+    if k >= n:
+        raise AssignmentError(f"Need more than {k} submitted essays to give each {k} peer reviews")
+
+    rng = random.Random(seed)
+    ring = list(essays)
+    rng.shuffle(ring)
+    author_of = {essay_id: author_id for author_id, essay_id in ring}
+    blocked = _conflict_set(conflicts)
+
+    pairs: List[Pair] = []
+    for i, (reviewer_id, _) in enumerate(ring):
+        for offset in range(1, k + 1):
+            pairs.append((reviewer_id, ring[(i + offset) % n][1]))
+    taken = set(pairs)
+
+    def ok(reviewer_id: int, essay_id: int) -> bool:
+        author_id = author_of[essay_id]
+        return (
+            reviewer_id != author_id
+            and frozenset((reviewer_id, author_id)) not in blocked
+            and (reviewer_id, essay_id) not in taken
+        )
+
+    unfilled: List[int] = []
+    if blocked:
+        for i, (reviewer_id, essay_id) in enumerate(pairs):
+            if frozenset((reviewer_id, author_of[essay_id])) not in blocked:
+                continue
+            # Swapping essays keeps both reviewers' workloads and both essays' review counts intact
+            for _ in range(64):
+                j = rng.randrange(len(pairs))
+                other_reviewer, other_essay = pairs[j]
+                taken.discard(pairs[i])
+                taken.discard(pairs[j])
+                if ok(reviewer_id, other_essay) and ok(other_reviewer, essay_id):
+                    pairs[i], pairs[j] = (reviewer_id, other_essay), (other_reviewer, essay_id)
+                    taken.update((pairs[i], pairs[j]))
+                    break
+                taken.update((pairs[i], pairs[j]))
+        bad = {i for i, (r, e) in enumerate(pairs) if frozenset((r, author_of[e])) in blocked}
+        unfilled = [pairs[i][1] for i in sorted(bad)]
+        pairs = [pair for i, pair in enumerate(pairs) if i not in bad]
+
+    return pairs, unfilled
+
+def pick_replacements(
+    orphaned: List[Pair],
+    load: Dict[int, int],
+    existing: Set[Pair],
+    conflicts: Iterable[Iterable[int]] = (),
+) -> Tuple[List[Pair], List[int]]:
+    """
+    Find a new reviewer for each (author_id, essay_id) in orphaned, always taking the least
+    loaded eligible reviewer from load. O(m log n) when most candidates are eligible.
+    """
+    blocked = _conflict_set(conflicts)
+    heap = [(count, reviewer_id) for reviewer_id, count in load.items()]
+    heapq.heapify(heap)
+    taken = set(existing)
+    pairs: List[Pair] = []
+    unfilled: List[int] = []
+
+    for author_id, essay_id in orphaned:
+        skipped = []
+        chosen = None
+        while heap:
+            count, reviewer_id = heapq.heappop(heap)
+            if (
+                reviewer_id != author_id
+                and frozenset((reviewer_id, author_id)) not in blocked
+                and (reviewer_id, essay_id) not in taken
+            ):
+                chosen = (count, reviewer_id)
+                break
+            skipped.append((count, reviewer_id))
+        for item in skipped:
+            heapq.heappush(heap, item)
+        if chosen is None:
+            unfilled.append(essay_id)
+            continue
+        count, reviewer_id = chosen
+        pairs.append((reviewer_id, essay_id))
+        taken.add((reviewer_id, essay_id))
+        heapq.heappush(heap, (count + 1, reviewer_id))
+
+    return pairs, unfilled
+
+def _submitted_essays(db: Session, assignment_id: int) -> List[Pair]:
+    """Latest submitted essay per author for an assignment, as (author_id, essay_id)"""
+    rows = (
+        db.query(Essay.author_id, func.max(Essay.id))
+        .filter(Essay.assignment_id == assignment_id, Essay.is_draft.is_(False))
+        .group_by(Essay.author_id)
+        .all()
+    )
+    return [(author_id, essay_id) for author_id, essay_id in rows]
+
+def _insert_pending(db: Session, pairs: List[Pair]) -> None:
+    if pairs:
+        db.execute(insert(Review), [
+            {"essay_id": essay_id, "reviewer_id": reviewer_id, "status": ReviewStatus.PENDING}
+            for reviewer_id, essay_id in pairs
+        ])
+
+def create_peer_reviews(db: Session, assignment, conflicts=(), seed: Optional[int] = None) -> dict:
+    essays = _submitted_essays(db, assignment.id)
+    authors = {author_id for author_id, _ in essays}
+    already = (
+        db.query(Review.id)
+        .join(Essay, Essay.id == Review.essay_id)
+        .filter(Essay.assignment_id == assignment.id, Review.reviewer_id.in_(authors))
+        .first()
+    )
+    if already:
+        raise AssignmentError("Peer reviews have already been assigned")
+    pairs, unfilled = assign_reviewers(essays, assignment.reviews_per_essay, conflicts, seed)
+    _insert_pending(db, pairs)
+    db.commit()
+    return {"created": len(pairs), "unfilled_essay_ids": unfilled}
+
+def reassign_dropped(db: Session, assignment, dropped_user_ids: List[int], conflicts=()) -> dict:
+    """
+    Remove dropped students from an assignment's peer review and hand their pending
+    reviews to the least loaded remaining students, touching only the affected rows.
+    """
+    dropped = set(dropped_user_ids)
+    essays = _submitted_essays(db, assignment.id)
+    author_of = {essay_id: author_id for author_id, essay_id in essays}
+    active = {author_id for author_id, _ in essays if author_id not in dropped}
+
+    reviews = (
+        db.query(Review.id, Review.reviewer_id, Review.essay_id, Review.status)
+        .join(Essay, Essay.id == Review.essay_id)
+        .filter(Essay.assignment_id == assignment.id, Review.reviewer_id.isnot(None))
+        .all()
+    )
+
+    remove: List[int] = []
+    orphaned: List[Pair] = []
+    load: Dict[int, int] = defaultdict(int)
+    existing: Set[Pair] = set()
+    for review_id, reviewer_id, essay_id, status in reviews:
+        author_id = author_of.get(essay_id)
+        pending = status == ReviewStatus.PENDING
+        if pending and author_id in dropped:
+            remove.append(review_id)
+        elif pending and reviewer_id in dropped:
+            remove.append(review_id)
+            if author_id is not None:
+                orphaned.append((author_id, essay_id))
+        else:
+            existing.add((reviewer_id, essay_id))
+            if reviewer_id in active:
+                load[reviewer_id] += 1
+    for reviewer_id in active:
+        load.setdefault(reviewer_id, 0)
+
+    pairs, unfilled = pick_replacements(orphaned, dict(load), existing, conflicts)
+    if remove:
+        db.query(Review).filter(Review.id.in_(remove)).delete(synchronize_session=False)
+    _insert_pending(db, pairs)
+    db.commit()
+    return {"removed": len(remove), "created": len(pairs), "unfilled_essay_ids": unfilled}
@@ -0,0 +1,146 @@
+from difflib import SequenceMatcher
+from typing import List, Union
+
+# A text operation is a list of components applied left to right over the
+# base document:
+#   positive int -> retain that many characters
+#   negative int -> delete that many characters
+#   str          -> insert the string
+# Offsets are counted in Unicode code points, matching Python's len().
+Op = Union[int, str]
+
+
+class OperationError(ValueError):
+    pass
+
+
+def base_length(ops: List[Op]) -> int:
+    """Length of the document the operation applies to"""
+    return sum(abs(c) for c in ops if isinstance(c, int))
+
+
+def target_length(ops: List[Op]) -> int:
+    """Length of the document after the operation is applied"""
+    return sum(c if isinstance(c, int) and c > 0 else len(c) if isinstance(c, str) else 0 for c in ops)
+
+
+def normalize(ops: List[Op]) -> List[Op]:
+    """Merge adjacent components of the same kind and drop empty ones"""
+    result: List[Op] = []
+    for c in ops:
+        if isinstance(c, bool) or not isinstance(c, (int, str)):
+            raise OperationError(f"Invalid component: {c!r}")
+        if c == 0 or c == "":
+            continue
+        if result and type(result[-1]) is type(c) and (isinstance(c, str) or (result[-1] > 0) == (c > 0)):
+            result[-1] += c
+        else:
+            result.append(c)
+    # Trailing retains carry no information
+    if result and isinstance(result[-1], int) and result[-1] > 0:
+        result.pop()
+    return result
+
+
+def apply(text: str, ops: List[Op]) -> str:
+    """Apply an operation to text, retaining any characters past its end"""
+    if base_length(ops) > len(text):
+        raise OperationError("Operation spans past the end of the document")
+    parts: List[str] = []
+    pos = 0
+    for c in ops:
+        if isinstance(c, str):
+            parts.append(c)
+        elif c > 0:
+            parts.append(text[pos:pos + c])
+            pos += c
+        else:
+            pos -= c
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def compose(a: List[Op], b: List[Op]) -> List[Op]:
+    """Combine two consecutive operations into one with the same effect.
+
+    Both operations are normalized, so trailing retains are implicit and
+    ``b`` may span past the explicit end of ``a``.
+    """
+    a = list(normalize(a))
+    b = list(normalize(b))
+    result: List[Op] = []
+    i = j = 0
+    ca = a[0] if a else None
+    cb = b[0] if b else None
+
+    while ca is not None or cb is not None:
+        # Deletes in `a` and inserts in `b` don't interact with the other side
+        if isinstance(ca, int) and ca < 0:
+            result.append(ca)
+            i += 1
+            ca = a[i] if i < len(a) else None
+            continue
+        if isinstance(cb, str):
+            result.append(cb)
+            j += 1
+            cb = b[j] if j < len(b) else None
+            continue
+        if ca is None:
+            # Past the end of `a`: an implicit retain of the rest
+            result.extend([cb] + b[j + 1:])
+            break
+        if cb is None:
+            result.extend([ca] + a[i + 1:])
+            break
+
+        if isinstance(ca, str):
+            if cb > 0:
+                n = min(len(ca), cb)
+                result.append(ca[:n])
+                ca, cb = ca[n:] or None, cb - n or None
+            else:
+                n = min(len(ca), -cb)
+                ca, cb = ca[n:] or None, cb + n or None
+        else:
+            if cb > 0:
+                n = min(ca, cb)
+                result.append(n)
+                ca, cb = ca - n or None, cb - n or None
+            else:
+                n = min(ca, -cb)
+                result.append(-n)
+                ca, cb = ca - n or None, cb + n or None
+
+        if ca is None:
+            i += 1
+            ca = a[i] if i < len(a) else None
+        if cb is None:
+            j += 1
+            cb = b[j] if j < len(b) else None
+
+    return normalize(result)
+
+
+def diff(old: str, new: str) -> List[Op]:
+    """Build an operation turning old into new"""
+    # Edits are usually local, so strip the common ends before running the matcher
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    a = old[prefix:len(old) - suffix]
+    b = new[prefix:len(new) - suffix]
+
+    ops: List[Op] = [prefix]
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(b[j1:j2])
+    return normalize(ops)
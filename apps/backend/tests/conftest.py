@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway database first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/writewise-test.db"
+os.environ["LEADERBOARD_BACKEND"] = "memory"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401
+from app.models.base import Base
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def login(client):
+    def _login(email: str) -> dict:
+        response = client.post("/auth/login", data={"username": email, "password": "password123"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return _login
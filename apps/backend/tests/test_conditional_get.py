@@ -0,0 +1,36 @@
+def test_title_edit_invalidates_essay_etag(client, login):
+    headers = login("student1@demo.com")
+    first = client.get("/essays/1", headers=headers)
+    etag = first.headers["etag"]
+    assert client.get("/essays/1", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # Lands within the same second as the read, which updated_at alone can't tell apart
+    client.put("/essays/1", json={"title": first.json()["title"] + " (edited)"}, headers=headers)
+    fresh = client.get("/essays/1", headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["title"].endswith("(edited)")
+    assert client.get("/essays/1", headers={**headers, "If-None-Match": fresh.headers["etag"]}).status_code == 304
+
+def test_list_etag_follows_edits(client, login):
+    headers = login("student1@demo.com")
+    etag = client.get("/essays", headers=headers).headers["etag"]
+    assert client.get("/essays", headers={**headers, "If-None-Match": etag}).status_code == 304
+    client.put("/essays/1", json={"is_draft": True}, headers=headers)
+    client.put("/essays/1", json={"is_draft": False}, headers=headers)
+    assert client.get("/essays", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_folding_on_read_keeps_the_etag_valid(client, login):
+    headers = login("student1@demo.com")
+    revision = client.get("/essays/1", headers=headers).json()["revision"]
+    client.patch("/essays/1", json={"base_revision": revision, "ops": ["Intro. "]}, headers=headers)
+    read = client.get("/essays/1", headers=headers)
+    assert read.json()["content"].startswith("Intro. ")
+    assert client.get("/essays/1", headers={**headers, "If-None-Match": read.headers["etag"]}).status_code == 304
+
+def test_review_score_edit_invalidates_review_etag(client, login):
+    headers = login("teacher@demo.com")
+    listing = client.get("/reviews/essay/1", headers=headers)
+    etag = listing.headers["etag"]
+    review = next(r for r in listing.json() if r["reviewer_id"] is not None)
+    client.put(f"/reviews/{review['id']}", json={"comments": "Re-read"}, headers=headers)
+    assert client.get("/reviews/essay/1", headers={**headers, "If-None-Match": etag}).status_code == 200
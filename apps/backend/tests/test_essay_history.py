@@ -0,0 +1,65 @@
+import random
+
+from app.config import settings
+from app.models.essay import Essay
+from app.models.essay_revision import EssayRevision
+from app.services.essay_edits import fold_pending_edits, record_edit, replace_content
+from app.services.essay_history import add_snapshot, reconstruct
+from app.services.text_ops import diff
+
+def make_essay(db, content: str) -> Essay:
+    essay = Essay(title="t", content=content, author_id=1, revision=0, content_revision=0)
+    db.add(essay)
+    db.flush()
+    add_snapshot(db, essay.id, 0, content)
+    db.commit()
+    return essay
+
+def test_reconstructs_every_revision_across_snapshots(db, monkeypatch):
+    monkeypatch.setattr(settings, "essay_snapshot_interval", 4)
+    monkeypatch.setattr(settings, "essay_edit_fold_threshold", 3)
+    rng = random.Random(9)
+    text = "the quick brown fox"
+    essay = make_essay(db, text)
+    texts = {0: text}
+    for revision in range(30):
+        words = text.split(" ")
+        words[rng.randrange(len(words))] = rng.choice(["jumps", "over", "a", "lazy", "dog", ""])
+        new = " ".join(words) + rng.choice(["", "!"])
+        ops = diff(text, new)
+        if not ops:
+            continue
+        text = new
+        texts[record_edit(db, essay.id, max(texts), ops)] = text
+
+    snapshots = [r for (r,) in db.query(EssayRevision.revision).filter(EssayRevision.is_snapshot.is_(True))]
+    assert len(snapshots) > 2
+    for revision, expected in texts.items():
+        assert reconstruct(db, essay.id, revision) == expected
+    assert reconstruct(db, essay.id, max(texts) + 1) is None
+
+def test_fold_brings_content_up_to_the_head(db, monkeypatch):
+    monkeypatch.setattr(settings, "essay_edit_fold_threshold", 100)
+    essay = make_essay(db, "hello")
+    record_edit(db, essay.id, 0, [5, " world"])
+    record_edit(db, essay.id, 1, [-1, "H"])
+    db.refresh(essay)
+    assert (essay.content, essay.content_revision, essay.revision) == ("hello", 0, 2)
+
+    fold_pending_edits(db, essay)
+    assert (essay.content, essay.content_revision) == ("Hello world", 2)
+    assert reconstruct(db, essay.id, 1) == "hello world"
+
+def test_replace_content_records_a_delta(db):
+    essay = make_essay(db, "draft one")
+    replace_content(db, essay, "draft two")
+    db.commit()
+    db.refresh(essay)
+    assert (essay.content, essay.revision, essay.content_revision) == ("draft two", 1, 1)
+    assert reconstruct(db, essay.id, 0) == "draft one"
+    assert reconstruct(db, essay.id, 1) == "draft two"
+
+def test_noop_edit_writes_nothing(db):
+    essay = make_essay(db, "hello")
+    assert record_edit(db, essay.id, 0, [100]) == 0
+    assert db.query(EssayRevision).count() == 1
@@ -0,0 +1,131 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from app.config import settings
+from app.models.assignment import Assignment
+from app.models.course import Course
+from app.models.essay import Essay
+from app.models.grade_outbox import GradeOutbox, OutboxStatus
+from app.models.review import Review, ReviewStatus
+from app.models.user import User, UserRole
+from app.services.grade_sync import _claim, dispatch_pending, enqueue_grade, handle_webhook
+
+def make_review(db) -> Review:
+    teacher = User(email="t@example.com", hashed_password="x", first_name="T", last_name="T", role=UserRole.TEACHER)
+    student = User(email="s@example.com", hashed_password="x", first_name="S", last_name="S", role=UserRole.STUDENT)
+    db.add_all([teacher, student])
+    db.flush()
+    course = Course(name="c", teacher_id=teacher.id, lms_course_id="C1")
+    db.add(course)
+    db.flush()
+    assignment = Assignment(course_id=course.id, title="a", lms_assignment_id="A1")
+    db.add(assignment)
+    db.flush()
+    essay = Essay(title="e", content="text", author_id=student.id, assignment_id=assignment.id, is_draft=False)
+    db.add(essay)
+    db.flush()
+    review = Review(essay_id=essay.id, reviewer_id=teacher.id, status=ReviewStatus.COMPLETED)
+    db.add(review)
+    grade(db, review, 5.0)
+    return review
+
+def grade(db, review: Review, score: float) -> None:
+    review.grammar_score = review.clarity_score = review.argument_score = score
+    enqueue_grade(db, review)
+    db.commit()
+
+class FakeLms:
+    """Records the scores of every grade posted and answers with the queued status codes"""
+
+    def __init__(self, *statuses: int, on_request=None):
+        self.statuses = list(statuses)
+        self.on_request = on_request
+        self.received = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.received += [g["score"] for g in json.loads(request.content)["grades"]]
+        if self.on_request:
+            self.on_request()
+        return httpx.Response(self.statuses.pop(0) if self.statuses else 200, json={})
+
+    def client(self) -> httpx.Client:
+        return httpx.Client(base_url="http://lms", transport=httpx.MockTransport(self.handler))
+
+def outbox(db):
+    db.expire_all()
+    return [(row.score, row.status) for row in db.query(GradeOutbox).order_by(GradeOutbox.id)]
+
+def test_sends_due_grades_once(db):
+    make_review(db)
+    lms = FakeLms()
+    stats = dispatch_pending(db, lms.client())
+    assert stats["sent"] == 1 and stats["batches"] == 1
+    assert dispatch_pending(db, lms.client())["batches"] == 0
+    assert lms.received == [5.0]
+    assert outbox(db) == [(5.0, OutboxStatus.SENT)]
+
+def test_comment_edits_do_not_requeue(db):
+    review = make_review(db)
+    review.comments = "nice"
+    assert enqueue_grade(db, review) is None
+    grade(db, review, 6.0)
+    assert outbox(db) == [(5.0, OutboxStatus.SUPERSEDED), (6.0, OutboxStatus.PENDING)]
+
+def test_failed_send_is_retried_with_backoff(db):
+    make_review(db)
+    lms = FakeLms(503)
+    assert dispatch_pending(db, lms.client())["retried"] == 1
+    entry = db.query(GradeOutbox).one()
+    assert entry.status == OutboxStatus.PENDING and entry.attempts == 1 and entry.leased_until is None
+    # Not due yet, so nothing is sent
+    assert dispatch_pending(db, lms.client())["batches"] == 0
+
+def test_regrade_during_failed_send_is_not_overwritten(db):
+    review = make_review(db)
+    lms = FakeLms(503, on_request=lambda: grade(db, review, 9.0))
+    stats = dispatch_pending(db, lms.client())
+    assert stats["superseded"] == 1 and stats["retried"] == 0
+    dispatch_pending(db, lms.client())
+    dispatch_pending(db, lms.client())
+    # The LMS must end on the regrade, never on the stale score sent after it
+    assert lms.received == [5.0, 9.0]
+    assert outbox(db) == [(5.0, OutboxStatus.SUPERSEDED), (9.0, OutboxStatus.SENT)]
+
+def test_claim_waits_for_a_live_lease_and_retakes_an_expired_one(db):
+    review = make_review(db)
+    now = datetime.now(timezone.utc)
+    stats = {"superseded": 0}
+    assert len(_claim(db, now, 10, stats)["C1"]) == 1
+    grade(db, review, 9.0)
+    # The regrade is due, but another dispatcher still holds the older grade of this student
+    assert _claim(db, now + timedelta(seconds=60), 10, stats) == {}
+    later = now + timedelta(days=1)
+    claimed = _claim(db, later, 10, stats)
+    assert [g["score"] for g in claimed["C1"]] == [9.0]
+    assert stats["superseded"] == 1
+    assert outbox(db) == [(5.0, OutboxStatus.SUPERSEDED), (9.0, OutboxStatus.IN_FLIGHT)]
+
+def test_webhook_settles_grade_once(db):
+    make_review(db)
+    entry = db.query(GradeOutbox).one()
+    data = {"idempotency_key": entry.idempotency_key, "reason": "closed"}
+    assert handle_webhook(db, "evt-1", "grade.rejected", data) is True
+    assert handle_webhook(db, "evt-1", "grade.accepted", data) is False
+    db.refresh(entry)
+    assert entry.status == OutboxStatus.FAILED and entry.last_error == "closed"
+    # A grade the webhook settled is not sent again
+    assert dispatch_pending(db, FakeLms().client())["batches"] == 0
+
+def test_webhook_requires_a_signature(client, monkeypatch):
+    body = json.dumps({"event_id": "evt-sig", "type": "grade.accepted", "data": {}}).encode()
+    monkeypatch.setattr(settings, "lms_webhook_secret", None)
+    assert client.post("/lms/webhook", content=body).status_code == 503
+    monkeypatch.setattr(settings, "lms_webhook_secret", "s3cret")
+    assert client.post("/lms/webhook", content=body).status_code == 401
+    signature = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    response = client.post("/lms/webhook", content=body, headers={"x-lms-signature": signature})
+    assert response.status_code == 200
@@ -0,0 +1,65 @@
+import bisect
+import random
+
+import pytest
+
+from app.models.review import Review, ReviewStatus
+from app.models.user import UserRole
+from app.services.leaderboard import PEER_REVIEW_POINTS, InMemoryLeaderboardStore, _IndexableSkipList, _award
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(5)
+    skip = _IndexableSkipList()
+    expected = []
+    for _ in range(3000):
+        if expected and rng.random() < 0.4:
+            key = expected[rng.randrange(len(expected))]
+            skip.remove(key)
+            expected.remove(key)
+        else:
+            key = (rng.randint(0, 200), str(rng.randint(0, 10**6)))
+            if key in expected:
+                continue
+            skip.insert(key)
+            bisect.insort(expected, key)
+        assert skip.size == len(expected)
+
+    assert [skip.at(i) for i in range(len(expected))] == expected
+    assert all(skip.rank(key) == i for i, key in enumerate(expected))
+
+def test_skip_list_missing_keys():
+    skip = _IndexableSkipList()
+    skip.insert((1, "a"))
+    with pytest.raises(KeyError):
+        skip.rank((2, "b"))
+    with pytest.raises(KeyError):
+        skip.remove((2, "b"))
+    with pytest.raises(IndexError):
+        skip.at(1)
+
+def test_store_ranks_like_a_sorted_set():
+    store = InMemoryLeaderboardStore()
+    for review_id, (member, points) in enumerate([("1", 30), ("2", 50), ("3", 30), ("4", 10)]):
+        store.apply_award(review_id, member, ["board"], points, None)
+
+    # Equal scores order by member, descending, as ZREVRANGE does
+    assert store.top("board", 3) == [("2", 50.0), ("3", 30.0), ("1", 30.0)]
+    assert store.around("board", "1", 1) == (1, [("3", 30.0), ("1", 30.0), ("4", 10.0)])
+    assert store.around("board", "missing", 1) == (None, [])
+
+def test_store_regrade_applies_only_the_difference():
+    store = InMemoryLeaderboardStore()
+    assert store.apply_award(7, "1", ["a", "b"], 40, None) == 40
+    assert store.apply_award(7, "1", ["a", "b"], 40, None) == 0
+    # A regrade goes to the boards of the original award, not the ones passed now
+    assert store.apply_award(7, "1", ["c"], 70, None) == 30
+    assert store.top("a", 1) == store.top("b", 1) == [("1", 70.0)]
+    assert store.top("c", 1) == []
+
+def test_empty_peer_reviews_earn_nothing():
+    empty = Review(reviewer_id=3, status=ReviewStatus.COMPLETED, comments=" ")
+    assert _award(empty, 9, UserRole.STUDENT) == (3, 0)
+    scored = Review(reviewer_id=3, status=ReviewStatus.COMPLETED, clarity_score=7)
+    assert _award(scored, 9, UserRole.STUDENT) == (3, PEER_REVIEW_POINTS)
+    commented = Review(reviewer_id=3, status=ReviewStatus.IN_PROGRESS, comments="Good")
+    assert _award(commented, 9, UserRole.STUDENT) == (3, 0)
@@ -0,0 +1,97 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.peer_review import AssignmentError, assign_reviewers, pick_replacements
+
+def make_essays(n: int):
+    return [(author_id, 1000 + author_id) for author_id in range(n)]
+
+@pytest.mark.parametrize("n,k", [(2, 1), (5, 2), (30, 3), (101, 4)])
+def test_every_essay_gets_k_reviewers(n, k):
+    essays = make_essays(n)
+    author_of = {essay_id: author_id for author_id, essay_id in essays}
+    pairs, unfilled = assign_reviewers(essays, k, seed=n)
+
+    assert unfilled == []
+    assert len(set(pairs)) == len(pairs)
+    assert all(author_of[essay_id] != reviewer_id for reviewer_id, essay_id in pairs)
+    assert set(Counter(essay_id for _, essay_id in pairs).values()) == {k}
+    assert set(Counter(reviewer_id for reviewer_id, _ in pairs).values()) == {k}
+
+def test_no_reciprocal_pairs_below_half_the_class():
+    essays = make_essays(40)
+    author_of = {essay_id: author_id for author_id, essay_id in essays}
+    pairs, _ = assign_reviewers(essays, 5, seed=7)
+    edges = {(reviewer_id, author_of[essay_id]) for reviewer_id, essay_id in pairs}
+    assert not any((b, a) in edges for a, b in edges)
+
+def test_conflicts_are_repaired():
+    rng = random.Random(3)
+    essays = make_essays(60)
+    author_of = {essay_id: author_id for author_id, essay_id in essays}
+    conflicts = {frozenset(rng.sample(range(60), 2)) for _ in range(40)}
+    pairs, unfilled = assign_reviewers(essays, 3, conflicts, seed=11)
+
+    assert all(frozenset((r, author_of[e])) not in conflicts for r, e in pairs)
+    assert all(author_of[e] != r for r, e in pairs)
+    counts = Counter(essay_id for _, essay_id in pairs)
+    # Essays that lost a conflicting pair are reported instead of silently short
+    assert all(counts[essay_id] + unfilled.count(essay_id) == 3 for _, essay_id in essays)
+
+def test_rejects_k_not_below_class_size():
+    with pytest.raises(AssignmentError):
+        assign_reviewers(make_essays(3), 3)
+    with pytest.raises(AssignmentError):
+        assign_reviewers(make_essays(3), 0)
+
+def test_replacements_go_to_least_loaded_eligible_reviewer():
+    orphaned = [(1, 101), (2, 102)]
+    load = {1: 0, 2: 0, 3: 5, 4: 1}
+    existing = {(2, 101)}
+    pairs, unfilled = pick_replacements(orphaned, load, existing, conflicts=[(4, 2)])
+    assert unfilled == []
+    # 2 already reviews 101 and 1 wrote it; 1 is free for 102 while 4 conflicts with its author
+    assert pairs == [(4, 101), (1, 102)]
+
+def assign_pair(client, login):
+    """Two students' essays in a fresh assignment, each reviewed by the other"""
+    teacher = login("teacher@demo.com")
+    students = [login("student1@demo.com"), login("student2@demo.com")]
+    course = client.post("/courses", json={"name": "Peer review"}, headers=teacher).json()
+    assignment = client.post(
+        f"/courses/{course['id']}/assignments", json={"title": "Essay 1", "reviews_per_essay": 1}, headers=teacher
+    ).json()
+    essay_ids = []
+    for headers in students:
+        essay = client.post("/essays", json={"title": "Mine", "content": "text", "assignment_id": assignment["id"]}, headers=headers).json()
+        client.put(f"/essays/{essay['id']}", json={"is_draft": False}, headers=headers)
+        essay_ids.append(essay["id"])
+    client.post(f"/assignments/{assignment['id']}/peer-reviews", json={"seed": 1}, headers=teacher)
+    return teacher, students, essay_ids
+
+def test_assigned_reviewers_can_read_the_essay(client, login):
+    _, students, essay_ids = assign_pair(client, login)
+
+    assigned = [r["essay_id"] for r in client.get("/reviews/my", headers=students[0]).json() if r["essay_id"] in essay_ids]
+    assert assigned == [essay_ids[1]]
+    assert client.get(f"/essays/{essay_ids[1]}", headers=students[0]).status_code == 200
+    assert client.get(f"/essays/{essay_ids[1]}/revisions", headers=students[0]).status_code == 200
+    # Reviewing doesn't open up anyone else's essays
+    assert client.get("/essays/1", headers=students[1]).status_code == 404
+
+def test_students_only_fill_in_comments_and_scores(client, login):
+    teacher, students, essay_ids = assign_pair(client, login)
+    review = next(r for r in client.get("/reviews/my", headers=students[0]).json() if r["essay_id"] in essay_ids)
+    url = f"/reviews/{review['id']}"
+
+    assert client.put(url, json={"status": "completed"}, headers=students[0]).status_code == 403
+    assert client.put(f"{url}/peer", json={"status": "completed"}, headers=students[0]).status_code == 422
+    assert client.put(f"{url}/peer", json={"comments": "Nice"}, headers=students[1]).status_code == 403
+    assert client.put(f"{url}/peer", json={"comments": "Nice"}, headers=teacher).status_code == 403
+
+    assert client.put(f"{url}/peer", json={"comments": "  "}, headers=students[0]).json()["status"] == "in_progress"
+    response = client.put(f"{url}/peer", json={"comments": "Clear thesis", "clarity_score": 8}, headers=students[0])
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
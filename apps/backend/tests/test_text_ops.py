@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from app.services.text_ops import OperationError, apply, compose, diff, normalize
+
+ALPHABET = "ab cé\n"
+
+def random_text(rng: random.Random, max_len: int = 30) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_len)))
+
+def test_diff_round_trips():
+    rng = random.Random(1)
+    for _ in range(500):
+        old, new = random_text(rng), random_text(rng)
+        assert apply(old, diff(old, new)) == new
+
+def test_compose_matches_sequential_apply():
+    rng = random.Random(2)
+    for _ in range(500):
+        texts = [random_text(rng) for _ in range(4)]
+        ops = [diff(a, b) for a, b in zip(texts, texts[1:])]
+        composed = []
+        for op in ops:
+            composed = compose(composed, op)
+        assert apply(texts[0], composed) == texts[-1]
+
+def test_apply_retains_past_the_end():
+    assert apply("hello world", [5, ","]) == "hello, world"
+    assert apply("hello world", [-6]) == "world"
+
+def test_apply_rejects_overlong_operation():
+    with pytest.raises(OperationError):
+        apply("abc", [4])
+
+def test_normalize_merges_components():
+    assert normalize([1, 2, "a", "b", -1, -2, 0, ""]) == [3, "ab", -3]